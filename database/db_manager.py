@@ -195,19 +195,39 @@ class DBManager:
         start: Optional[str] = None,
         end:   Optional[str] = None,
         limit: int = 2000,
+        tank:      Optional[int]   = None,
+        level_min: Optional[float] = None,
+        level_max: Optional[float] = None,
+        newest:    bool = False,
     ) -> List[Dict]:
-        """기간별 센서 데이터 조회 (최근순 → 오래된순)"""
+        """
+        기간별 센서 데이터 조회 (최근순 → 오래된순)
+        level_min / level_max 는 tank(기본 1번) 수위 컬럼에 WHERE 로 적용
+        newest=True 면 limit 을 가장 최근 행 기준으로 적용 (반환 순서는 동일)
+        """
         if start is None:
             start = (datetime.now() - timedelta(hours=hours)).strftime("%Y-%m-%d %H:%M:%S")
         if end is None:
             end = self._ts_now()
-        sql = """SELECT * FROM sensor_readings
-                 WHERE timestamp BETWEEN ? AND ?
-                 ORDER BY timestamp ASC LIMIT ?"""
+        params: List[Any] = [start, end]
+        where  = "WHERE timestamp BETWEEN ? AND ?"
+        if level_min is not None or level_max is not None:
+            col = "tank2_level" if tank == 2 else "tank1_level"
+            if level_min is not None:
+                where += f" AND {col} >= ?"
+                params.append(level_min)
+            if level_max is not None:
+                where += f" AND {col} <= ?"
+                params.append(level_max)
+        sql = f"SELECT * FROM sensor_readings {where} ORDER BY timestamp ASC LIMIT ?"
+        if newest:
+            sql = (f"SELECT * FROM (SELECT * FROM sensor_readings {where} "
+                   f"ORDER BY timestamp DESC LIMIT ?) ORDER BY timestamp ASC")
+        params.append(limit)
         with self._lock:
             conn = self._get_conn()
             try:
-                rows = conn.execute(sql, (start, end, limit)).fetchall()
+                rows = conn.execute(sql, params).fetchall()
                 return self._rows_to_dicts(rows)
             finally:
                 conn.close()
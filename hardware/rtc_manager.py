@@ -37,6 +37,15 @@ class RTCManager:
         """
         return datetime.datetime.now().timetuple()
 
+    def now(self):
+        """
+        현재 시간 (datetime 객체)
+
+        Returns:
+            datetime.datetime: 현재 시간 (초 단위 절삭)
+        """
+        return datetime.datetime.now().replace(microsecond=0)
+
     def get_datetime_string(self, format="%Y-%m-%d %H:%M:%S"):
         """
         현재 시간을 문자열로 반환
@@ -221,15 +221,19 @@ class AutoIrrigationController:
             return
 
         dry_zones = []
+        # 구역별 설정은 zone_id 로 한 번에 색인 (구역마다 sensors 목록 선형 탐색 방지)
+        zone_cfgs = {}
+        for s in self.config.get('sensors', []):
+            zone_cfgs.setdefault(s['zone_id'], s)
+        now = datetime.now()
         for zone_id, data in sorted(sensor_data.items()):
             # ── S9: 3단계 관수 주기 판단 ──────────────────────────────────
-            zone_cfg     = next((s for s in self.config.get('sensors', [])
-                                 if s['zone_id'] == zone_id), {})
+            zone_cfg     = zone_cfgs.get(zone_id, {})
             min_interval = zone_cfg.get('min_irrigation_interval', 21600)   # 기본 6h
             max_interval = zone_cfg.get('max_irrigation_interval', 259200)  # 기본 3일
 
             last_t  = self.last_irrigated_time.get(zone_id)
-            elapsed = (datetime.now() - last_t).total_seconds() if last_t else float('inf')
+            elapsed = (now - last_t).total_seconds() if last_t else float('inf')
 
             # 1단계: 미관수 주기 내 → 무조건 스킵
             if elapsed < min_interval:
@@ -20,10 +20,15 @@ from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Callable
 from enum import Enum
 import threading
+from collections import deque
+from itertools import islice
 
 # BUG-7: 설치 경로 동적 계산 (하드코딩 제거)
 _BASE_DIR = Path(__file__).resolve().parent.parent
 
+# 최소 수위의 이 비율 미만이면 WARNING 대신 CRITICAL
+CRITICAL_LEVEL_RATIO = 0.8
+
 
 class AlertLevel(Enum):
     """경고 레벨"""
@@ -44,6 +49,10 @@ class AlertType(Enum):
 class Alert:
     """경고 데이터 클래스"""
 
+    # 이벤트마다 생성되므로 __dict__ 대신 슬롯 사용 (Pi 메모리 절약)
+    __slots__ = ('alert_type', 'level', 'message', 'tank_num',
+                 'value', 'threshold', 'timestamp', '_str')
+
     def __init__(self,
                  alert_type: AlertType,
                  level: AlertLevel,
@@ -59,12 +68,16 @@ class Alert:
         self.value = value
         self.threshold = threshold      # Stage 12
         self.timestamp = timestamp or datetime.now()
+        self._str = None
 
     def __str__(self):
-        time_str = self.timestamp.strftime('%Y-%m-%d %H:%M:%S')
-        tank_str = f" [탱크{self.tank_num}]" if self.tank_num else ""
-        value_str = f" ({self.value:.1f}%)" if self.value is not None else ""
-        return f"[{self.level.value}] {time_str}{tank_str} {self.message}{value_str}"
+        # 콘솔 + 로그 파일에서 두 번 호출되므로 최초 1회만 포맷
+        if self._str is None:
+            time_str = self.timestamp.strftime('%Y-%m-%d %H:%M:%S')
+            tank_str = f" [탱크{self.tank_num}]" if self.tank_num else ""
+            value_str = f" ({self.value:.1f}%)" if self.value is not None else ""
+            self._str = f"[{self.level.value}] {time_str}{tank_str} {self.message}{value_str}"
+        return self._str
 
     def to_dict(self) -> Dict:
         return {
@@ -98,8 +111,8 @@ class AlertManager:
                  vol_max: float = 3.2):          # 센서 정상 전압 상한
         # 수위 임계값
         self.thresholds = {
-            1: {'min': tank1_min, 'max': tank1_max},
-            2: {'min': tank2_min, 'max': tank2_max}
+            1: self._make_threshold(tank1_min, tank1_max),
+            2: self._make_threshold(tank2_min, tank2_max)
         }
 
         # 쿨다운 설정
@@ -117,9 +130,11 @@ class AlertManager:
         # Stage 12: SQLite DB 연동
         self.db_manager = db_manager
 
-        # 경고 히스토리 (메모리)
-        self.alert_history: List[Alert] = []
+        # 경고 히스토리 (메모리) — 전체 + 레벨별 링 버퍼, 최근 limit 개 조회가 O(limit)
         self.max_history = 100
+        self.alert_history = deque(maxlen=self.max_history)
+        self._history_by_level = {lvl: deque(maxlen=self.max_history) for lvl in AlertLevel}
+        self.alert_seq = 0   # 히스토리에 추가될 때마다 증가 (ETag 등 변경 감지용)
 
         # 콜백 함수들
         self.callbacks: List[Callable] = []
@@ -145,31 +160,41 @@ class AlertManager:
             if log_dir and not os.path.exists(log_dir):
                 os.makedirs(log_dir)
 
+    @staticmethod
+    def _make_threshold(min_level: float, max_level: float) -> Dict:
+        """임계값 dict 생성 (CRITICAL 하한은 설정 시 1회만 계산)"""
+        return {
+            'min': min_level,
+            'max': max_level,
+            'critical_min': min_level * CRITICAL_LEVEL_RATIO,
+        }
+
     def set_threshold(self, tank_num: int, min_level: float, max_level: float):
         if tank_num not in [1, 2]:
             raise ValueError("탱크 번호는 1 또는 2여야 합니다")
-        self.thresholds[tank_num] = {'min': min_level, 'max': max_level}
+        self.thresholds[tank_num] = self._make_threshold(min_level, max_level)
         print(f"✅ 탱크{tank_num} 임계값 설정: {min_level}% ~ {max_level}%")
 
     def add_callback(self, callback: Callable):
         self.callbacks.append(callback)
 
-    def _is_cooldown_active(self, alert_key: str) -> bool:
+    def _is_cooldown_active(self, alert_key: str, now: Optional[datetime] = None) -> bool:
         if alert_key not in self.last_alert_time:
             return False
-        elapsed = (datetime.now() - self.last_alert_time[alert_key]).total_seconds()
+        elapsed = ((now or datetime.now()) - self.last_alert_time[alert_key]).total_seconds()
         return elapsed < self.cooldown_seconds
 
-    def _update_cooldown(self, alert_key: str):
-        self.last_alert_time[alert_key] = datetime.now()
+    def _update_cooldown(self, alert_key: str, now: Optional[datetime] = None):
+        self.last_alert_time[alert_key] = now or datetime.now()
 
-    def _create_alert(self,
+    def _record_alert(self,
                       alert_type: AlertType,
                       level: AlertLevel,
                       message: str,
                       tank_num: Optional[int] = None,
                       value: Optional[float] = None,
                       threshold: Optional[float] = None) -> Alert:   # Stage 12
+        """알림 생성 + 히스토리 추가 (self._lock 보유 상태에서 호출)"""
         alert = Alert(
             alert_type=alert_type,
             level=level,
@@ -178,12 +203,15 @@ class AlertManager:
             value=value,
             threshold=threshold,
         )
+        self.alert_history.append(alert)
+        self._history_by_level[level].append(alert)
+        self.alert_seq += 1
+        return alert
 
+    def _create_alert(self, *args, **kwargs) -> Alert:
         with self._lock:
-            self.alert_history.append(alert)
-            if len(self.alert_history) > self.max_history:
-                self.alert_history.pop(0)
-
+            alert = self._record_alert(*args, **kwargs)
+        # 콜백(SocketIO, Telegram, DB)은 락 밖에서 실행
         self._send_alert(alert)
         return alert
 
@@ -238,7 +266,40 @@ class AlertManager:
             print(f"⚠️  DB 알림 저장 실패: {e}")
     # ─────────────────────────────────────────────────────────────────────────
 
-    def check_water_level(self, tank_num: int, level: float) -> Optional[Alert]:
+    def check_all(self, tank_levels: List[float], voltages: List,
+                  now: Optional[datetime] = None) -> List[Alert]:
+        """
+        한 주기 분 수위/센서 점검을 한 번에 수행
+
+        tank_levels[0] 은 탱크1, voltages[i] 는 채널 i.
+        쿨다운 계산은 모두 같은 now 기준이고 락은 주기당 한 번만 획득.
+        발송(콜백)은 락을 놓은 뒤 수행. 발생한 경고 목록 반환
+        """
+        now = now or datetime.now()
+        alerts = []
+        with self._lock:
+            for tank_num, level in enumerate(tank_levels, 1):
+                alert = self._check_water_level(tank_num, level, now)
+                if alert:
+                    alerts.append(alert)
+            for channel, voltage in enumerate(voltages):
+                alert = self._check_sensor_error(voltage, channel, now)
+                if alert:
+                    alerts.append(alert)
+        for alert in alerts:
+            self._send_alert(alert)
+        return alerts
+
+    def check_water_level(self, tank_num: int, level: float,
+                          now: Optional[datetime] = None) -> Optional[Alert]:
+        with self._lock:
+            alert = self._check_water_level(tank_num, level, now)
+        if alert:
+            self._send_alert(alert)
+        return alert
+
+    def _check_water_level(self, tank_num: int, level: float,
+                           now: Optional[datetime] = None) -> Optional[Alert]:
         if tank_num not in self.thresholds:
             return None
 
@@ -248,11 +309,11 @@ class AlertManager:
 
         if level < min_level:
             alert_key = f"low_water_tank{tank_num}"
-            if not self._is_cooldown_active(alert_key):
-                self._update_cooldown(alert_key)
-                return self._create_alert(
+            if not self._is_cooldown_active(alert_key, now):
+                self._update_cooldown(alert_key, now)
+                return self._record_alert(
                     alert_type=AlertType.LOW_WATER_LEVEL,
-                    level=AlertLevel.CRITICAL if level < min_level * 0.8 else AlertLevel.WARNING,
+                    level=AlertLevel.CRITICAL if level < threshold['critical_min'] else AlertLevel.WARNING,
                     message=f"탱크 {tank_num} 수위 부족 (최소: {min_level}%)",
                     tank_num=tank_num,
                     value=level,
@@ -261,9 +322,9 @@ class AlertManager:
 
         elif level > max_level:
             alert_key = f"high_water_tank{tank_num}"
-            if not self._is_cooldown_active(alert_key):
-                self._update_cooldown(alert_key)
-                return self._create_alert(
+            if not self._is_cooldown_active(alert_key, now):
+                self._update_cooldown(alert_key, now)
+                return self._record_alert(
                     alert_type=AlertType.HIGH_WATER_LEVEL,
                     level=AlertLevel.WARNING,
                     message=f"탱크 {tank_num} 수위 과잉 (최대: {max_level}%)",
@@ -274,7 +335,14 @@ class AlertManager:
 
         return None
 
-    def check_sensor_error(self, voltage, channel: int):
+    def check_sensor_error(self, voltage, channel: int, now: Optional[datetime] = None):
+        with self._lock:
+            alert = self._check_sensor_error(voltage, channel, now)
+        if alert:
+            self._send_alert(alert)
+        return alert
+
+    def _check_sensor_error(self, voltage, channel: int, now: Optional[datetime] = None):
         """
         센서 오류 체크 (BUG-14 P1)
         - None 전압 허용 (I2C 읽기 실패)
@@ -290,18 +358,18 @@ class AlertManager:
             count    = self.sensor_error_counts[channel]
             volt_str = f"{voltage:.3f}V" if voltage is not None else "None (읽기 실패)"
 
-            if count >= 5 and not self._is_cooldown_active(alert_key + "_critical"):
-                self._update_cooldown(alert_key + "_critical")
-                return self._create_alert(
+            if count >= 5 and not self._is_cooldown_active(alert_key + "_critical", now):
+                self._update_cooldown(alert_key + "_critical", now)
+                return self._record_alert(
                     alert_type=AlertType.SENSOR_ERROR,
                     level=AlertLevel.CRITICAL,
                     message=f"채널 {channel} 센서 연속 오류 {count}회 ({volt_str})",
                     value=voltage,
                     threshold=None,
                 )
-            elif count == 1 and not self._is_cooldown_active(alert_key):
-                self._update_cooldown(alert_key)
-                return self._create_alert(
+            elif count == 1 and not self._is_cooldown_active(alert_key, now):
+                self._update_cooldown(alert_key, now)
+                return self._record_alert(
                     alert_type=AlertType.SENSOR_ERROR,
                     level=AlertLevel.WARNING,
                     message=f"채널 {channel} 센서 오류 ({volt_str})",
@@ -315,7 +383,7 @@ class AlertManager:
                 self.sensor_recovered[channel] = True
                 self.last_alert_time.pop(alert_key, None)
                 self.last_alert_time.pop(alert_key + "_critical", None)
-                return self._create_alert(
+                return self._record_alert(
                     alert_type=AlertType.SENSOR_ERROR,
                     level=AlertLevel.INFO,
                     message=f"채널 {channel} 센서 복구됨 (전압: {voltage:.3f}V)",
@@ -348,12 +416,10 @@ class AlertManager:
                           alert_type: Optional[AlertType] = None,
                           limit: int = 50) -> List[Alert]:
         with self._lock:
-            filtered = self.alert_history.copy()
-        if level:
-            filtered = [a for a in filtered if a.level == level]
-        if alert_type:
-            filtered = [a for a in filtered if a.alert_type == alert_type]
-        filtered.reverse()
+            src = self._history_by_level[level] if level else self.alert_history
+            if not alert_type:
+                return list(islice(reversed(src), limit))
+            filtered = [a for a in reversed(src) if a.alert_type == alert_type]
         return filtered[:limit]
 
     def get_alert_count(self,
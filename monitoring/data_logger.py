@@ -6,12 +6,17 @@ DataLogger 모듈 (Stage 11 – SQLite 병행 저장)
   - __init__에 db_manager 파라미터 추가
   - log_sensor_data()에서 DBManager.insert_sensor_reading() 호출
 
+CSV 행은 메모리 버퍼에 모았다가 일정 개수/시간마다 한 번에 기록
+(당일 파일 핸들은 열어 둔 채 재사용, 종료 시 atexit 으로 잔여 행 flush)
+
 작성자: spinoza-lab
 날짜:   2026-03-17
 """
 
+import atexit
 import csv
 import os
+import time
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
@@ -19,6 +24,10 @@ import threading
 
 _BASE_DIR = Path(__file__).resolve().parent.parent
 
+# 고정 스키마 + 숫자 값만 기록하므로 csv.writer 의 quoting 처리 없이 직접 포맷
+_CSV_HEADER = ("timestamp,tank1_level,tank2_level,"
+               "ch0_voltage,ch1_voltage,ch2_voltage,ch3_voltage\n")
+
 
 class DataLogger:
     """
@@ -42,7 +51,18 @@ class DataLogger:
         self.db_manager = db_manager
         self._lock      = threading.Lock()
 
+        # CSV 쓰기 버퍼 (행 단위 open/close 대신 일괄 기록)
+        self._buffer: List[str] = []
+        self._buffer_path: Optional[str] = None
+        self._buffer_max     = 64
+        self._flush_interval = 5.0
+        self._last_flush     = time.monotonic()
+        # 당일 CSV 파일 핸들 (날짜가 바뀔 때만 교체)
+        self._fh      = None
+        self._fh_path: Optional[str] = None
+
         self._ensure_log_directory()
+        atexit.register(self.close)
 
         _db_info = "SQLite + CSV" if db_manager else "CSV only"
         print(f"✅ DataLogger 초기화 완료 ({_db_info})")
@@ -61,16 +81,38 @@ class DataLogger:
         filename = f"sensors_{date.strftime('%Y-%m-%d')}.csv"
         return os.path.join(self.log_dir, filename)
 
-    def _ensure_csv_header(self, filepath: str):
-        if not os.path.exists(filepath) or os.path.getsize(filepath) == 0:
-            with open(filepath, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    'timestamp',
-                    'tank1_level', 'tank2_level',
-                    'ch0_voltage', 'ch1_voltage',
-                    'ch2_voltage', 'ch3_voltage'
-                ])
+    def _close_fh_locked(self):
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            finally:
+                self._fh      = None
+                self._fh_path = None
+
+    def _get_file(self, filepath: str):
+        """
+        filepath 용 append 핸들 반환
+        날짜가 바뀐 경우에만 이전 핸들을 닫고 새 파일을 열며,
+        헤더 필요 여부도 그때 한 번만 stat 으로 확인
+        """
+        if filepath != self._fh_path:
+            self._close_fh_locked()
+            needs_header = (not os.path.exists(filepath) or
+                            os.path.getsize(filepath) == 0)
+            self._fh      = open(filepath, 'a', newline='', buffering=1 << 16)
+            self._fh_path = filepath
+            if needs_header:
+                self._fh.write(_CSV_HEADER)
+        return self._fh
+
+    def _flush_locked(self):
+        """버퍼의 CSV 행을 한 번에 기록 (self._lock 보유 상태에서 호출)"""
+        if self._buffer:
+            fh = self._get_file(self._buffer_path)
+            fh.write("".join(self._buffer))
+            fh.flush()
+            self._buffer.clear()
+        self._last_flush = time.monotonic()
 
     # ── 공개 API ──────────────────────────────────────────────────────────────
 
@@ -97,20 +139,21 @@ class DataLogger:
 
             filepath = self._get_log_filename(timestamp)
 
-            # ── CSV 저장 ─────────────────────────────────────
+            # ── CSV 저장 (버퍼링) ────────────────────────────
             with self._lock:
-                self._ensure_csv_header(filepath)
-                with open(filepath, 'a', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow([
-                        timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                        f"{tank1_level:.1f}",
-                        f"{tank2_level:.1f}",
-                        f"{voltages[0]:.3f}",
-                        f"{voltages[1]:.3f}",
-                        f"{voltages[2]:.3f}",
-                        f"{voltages[3]:.3f}"
-                    ])
+                # 날짜가 바뀌면 이전 파일분을 먼저 기록
+                if filepath != self._buffer_path:
+                    self._flush_locked()
+                    self._buffer_path = filepath
+                self._buffer.append(
+                    f"{timestamp:%Y-%m-%d %H:%M:%S},"
+                    f"{tank1_level:.1f},{tank2_level:.1f},"
+                    f"{voltages[0]:.3f},{voltages[1]:.3f},"
+                    f"{voltages[2]:.3f},{voltages[3]:.3f}\n"
+                )
+                if (len(self._buffer) >= self._buffer_max or
+                        time.monotonic() - self._last_flush >= self._flush_interval):
+                    self._flush_locked()
 
             # ── SQLite 저장 (db_manager 가 있을 때만) ────────
             if self.db_manager:
@@ -127,81 +170,149 @@ class DataLogger:
             print(f"❌ 데이터 로깅 실패: {e}")
             return False
 
+    def flush(self):
+        """버퍼에 남은 CSV 행을 즉시 기록 (종료 시 atexit 에서 호출)"""
+        try:
+            with self._lock:
+                self._flush_locked()
+        except Exception as e:
+            print(f"❌ CSV flush 실패: {e}")
+
+    def close(self):
+        """잔여 행 기록 후 CSV 파일 핸들 닫기"""
+        try:
+            with self._lock:
+                self._flush_locked()
+                self._close_fh_locked()
+        except Exception as e:
+            print(f"❌ CSV 파일 닫기 실패: {e}")
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
     def get_data(self,
                  start_date:  Optional[datetime] = None,
                  end_date:    Optional[datetime] = None,
                  tank_filter: Optional[int]      = None,
                  level_min:   Optional[float]    = None,
-                 level_max:   Optional[float]    = None) -> List[Dict]:
+                 level_max:   Optional[float]    = None,
+                 limit:       Optional[int]      = None) -> List[Dict]:
         """
         저장된 데이터 조회
         db_manager 가 있으면 SQLite 에서, 없으면 CSV 에서 읽음
+        limit 을 주면 가장 최근 limit 행만 반환 (시간순)
         """
+        db_limit = {} if limit is None else {'limit': limit, 'newest': True}
         if self.db_manager and start_date is None and end_date is None:
-            # SQLite 경로: 최근 24 h 기본
-            rows = self.db_manager.query_sensor_readings(hours=24)
-            return self._filter_rows(rows, tank_filter, level_min, level_max)
+            # SQLite 경로: 최근 24 h 기본 (수위 필터는 SQL WHERE 로 처리)
+            return self.db_manager.query_sensor_readings(
+                hours=24, tank=tank_filter,
+                level_min=level_min, level_max=level_max, **db_limit)
 
         if self.db_manager and (start_date or end_date):
             s = start_date.strftime("%Y-%m-%d %H:%M:%S") if start_date else None
             e = end_date.strftime("%Y-%m-%d %H:%M:%S")   if end_date   else None
-            rows = self.db_manager.query_sensor_readings(start=s, end=e)
-            return self._filter_rows(rows, tank_filter, level_min, level_max)
+            return self.db_manager.query_sensor_readings(
+                start=s, end=e, tank=tank_filter,
+                level_min=level_min, level_max=level_max, **db_limit)
 
         # CSV 폴백
-        return self._get_data_csv(start_date, end_date, tank_filter, level_min, level_max)
-
-    def _filter_rows(self, rows, tank_filter, level_min, level_max):
-        if tank_filter is None and level_min is None and level_max is None:
-            return rows
-        result = []
-        for r in rows:
-            tank_key = f"tank{tank_filter}_level" if tank_filter else "tank1_level"
-            try:
-                level = float(r[tank_key])
-                if level_min is not None and level < level_min:
-                    continue
-                if level_max is not None and level > level_max:
-                    continue
-            except (KeyError, ValueError):
-                pass
-            result.append(r)
-        return result
+        if limit is not None and tank_filter is None:
+            return self._tail_data_csv(start_date, end_date, limit)
+        data = self._get_data_csv(start_date, end_date, tank_filter, level_min, level_max)
+        return data if limit is None else data[-limit:]
+
+    def _tail_data_csv(self, start_date, end_date, limit) -> List[Dict]:
+        """기간 내 최근 limit 행 — 마지막 날 파일부터 끝부분만 읽어 거슬러 올라감
+        (일 단위가 아니라 start_date~end_date 시각으로 행을 거름)"""
+        if limit <= 0:
+            return []
+        self.flush()
+        if end_date is None:
+            end_date = start_date or datetime.now()
+        if start_date is None:
+            start_date = end_date
+        lo = start_date.strftime("%Y-%m-%d %H:%M:%S")
+        hi = end_date.strftime("%Y-%m-%d %H:%M:%S")
+        first_day = start_date.date()
+        day = end_date
+        data = []
+        while day.date() >= first_day and len(data) < limit:
+            need = limit - len(data)
+            path = self._get_log_filename(day)
+            # 끝 시각 이후 행이 끝부분에 있으면 그만큼 더 읽음
+            n = need
+            while True:
+                rows  = self._tail_rows(path, n)
+                newer = sum(1 for r in rows if r.get('timestamp', '') > hi)
+                if len(rows) - newer >= need or len(rows) < n:
+                    break
+                n = need + newer
+            data = [r for r in rows if lo <= r.get('timestamp', '') <= hi][-need:] + data
+            if rows and rows[0].get('timestamp', '') < lo:
+                break   # 시작 시각 이전까지 거슬러 올라옴
+            day -= timedelta(days=1)
+        return data
 
     def _get_data_csv(self, start_date, end_date, tank_filter, level_min, level_max):
+        self.flush()  # 버퍼에 남은 최신 행까지 조회되도록
         if start_date is None:
             start_date = datetime.now()
         if end_date is None:
             end_date = start_date
 
+        # 날짜마다 stat 하지 않고 디렉토리를 한 번만 훑어 존재하는 파일 목록 확보
+        with os.scandir(self.log_dir) as it:
+            present = {entry.name for entry in it
+                       if entry.name.startswith("sensors_") and entry.name.endswith(".csv")}
+
         all_data = []
         current_date = start_date
         while current_date <= end_date:
             filepath = self._get_log_filename(current_date)
-            if os.path.exists(filepath):
+            if os.path.basename(filepath) in present:
                 try:
-                    with open(filepath, 'r') as f:
-                        reader = csv.DictReader(f)
-                        for row in reader:
-                            if self._apply_filters(row, tank_filter, level_min, level_max):
-                                all_data.append(row)
+                    all_data.extend(self._read_day_rows(
+                        filepath, tank_filter, level_min, level_max))
                 except Exception as e:
                     print(f"⚠️  파일 읽기 실패 ({filepath}): {e}")
             current_date += timedelta(days=1)
         return all_data
 
-    def _apply_filters(self, row, tank_filter, level_min, level_max):
-        try:
-            if tank_filter is not None:
-                tank_key = f"tank{tank_filter}_level"
-                level = float(row[tank_key])
-                if level_min is not None and level < level_min:
-                    return False
-                if level_max is not None and level > level_max:
-                    return False
-            return True
-        except (KeyError, ValueError):
-            return False
+    @staticmethod
+    def _read_day_rows(filepath, tank_filter, level_min, level_max) -> List[Dict]:
+        """
+        일별 CSV 읽기 + 수위 필터
+        컬럼 위치와 범위는 파일당 한 번만 계산하고, 필터가 없으면
+        행마다 float() 변환을 하지 않음
+        """
+        with open(filepath, 'r', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return []
+            if tank_filter is None:
+                return [dict(zip(header, row)) for row in reader]
+
+            tank_key = f"tank{tank_filter}_level"
+            if tank_key not in header:
+                return []
+            idx = header.index(tank_key)
+            lo  = float('-inf') if level_min is None else level_min
+            hi  = float('inf')  if level_max is None else level_max
+
+            rows = []
+            for row in reader:
+                try:
+                    level = float(row[idx])
+                except (IndexError, ValueError):
+                    continue
+                if lo <= level <= hi:
+                    rows.append(dict(zip(header, row)))
+            return rows
 
     def get_statistics(self,
                        start_date: Optional[datetime] = None,
@@ -222,44 +333,90 @@ class DataLogger:
                 'last':  None,
             }
 
-        # CSV 폴백
+        # CSV 폴백 (단일 패스로 count/sum/min/max 계산)
         data = self._get_data_csv(start_date, end_date, None, None, None)
         if not data:
             return {'count': 0, 'avg': 0.0, 'min': 0.0, 'max': 0.0, 'first': None, 'last': None}
         tank_key = f"tank{tank_num}_level"
-        levels = [float(row[tank_key]) for row in data]
+        count = 0
+        total = 0.0
+        lo = hi = first = last = None
+        for row in data:
+            level = float(row[tank_key])
+            if count == 0:
+                lo = hi = first = level
+            elif level < lo:
+                lo = level
+            elif level > hi:
+                hi = level
+            total += level
+            last = level
+            count += 1
         return {
-            'count': len(levels),
-            'avg':   sum(levels) / len(levels),
-            'min':   min(levels),
-            'max':   max(levels),
-            'first': levels[0],
-            'last':  levels[-1],
+            'count': count,
+            'avg':   total / count,
+            'min':   lo,
+            'max':   hi,
+            'first': first,
+            'last':  last,
         }
 
     def get_latest_data(self, limit: int = 10) -> List[Dict]:
         if self.db_manager:
             return self.db_manager.query_sensor_readings(hours=48, limit=limit)
+        if limit <= 0:
+            return []
+        self.flush()
         today     = datetime.now()
         yesterday = today - timedelta(days=1)
-        data = self._get_data_csv(yesterday, today, None, None, None)
-        return data[-limit:] if data else []
+        # 오늘 파일 끝부분만 읽고, 부족할 때만 어제 파일로 보충
+        data = self._tail_rows(self._get_log_filename(today), limit)
+        if len(data) < limit:
+            data = self._tail_rows(self._get_log_filename(yesterday),
+                                   limit - len(data)) + data
+        return data
+
+    @staticmethod
+    def _tail_rows(filepath: str, n: int) -> List[Dict]:
+        """CSV 파일 끝에서 n행만 읽기 (파일 전체를 파싱하지 않음)"""
+        if n <= 0 or not os.path.exists(filepath):
+            return []
+        try:
+            with open(filepath, 'rb') as f:
+                header = f.readline().decode().rstrip('\r\n').split(',')
+                size   = f.seek(0, os.SEEK_END)
+                block  = 64 * n   # 한 행 ≈ 55 bytes
+                while True:
+                    start = max(0, size - block)
+                    f.seek(start)
+                    # 첫 줄은 헤더(start == 0) 또는 잘린 행이므로 버림
+                    lines = [l for l in f.read(size - start).splitlines()[1:] if l]
+                    if len(lines) >= n or start == 0:
+                        break
+                    block *= 2
+        except Exception as e:
+            print(f"⚠️  파일 읽기 실패 ({filepath}): {e}")
+            return []
+        return [dict(zip(header, row))
+                for row in csv.reader(l.decode() for l in lines[-n:])]
 
     def delete_old_logs(self, days_to_keep: int = 30) -> int:
         deleted_count = 0
         cutoff_date   = datetime.now() - timedelta(days=days_to_keep)
+        # YYYY-MM-DD 는 문자열 비교로 날짜 순서가 보장되므로 strptime 불필요
+        # (파일 날짜 00:00 < cutoff 시각 ⇔ 파일 날짜 <= cutoff 날짜)
+        cutoff_str    = cutoff_date.strftime("%Y-%m-%d")
         try:
-            for filename in os.listdir(self.log_dir):
-                if filename.startswith("sensors_") and filename.endswith(".csv"):
-                    date_str = filename.replace("sensors_", "").replace(".csv", "")
-                    try:
-                        file_date = datetime.strptime(date_str, "%Y-%m-%d")
-                        if file_date < cutoff_date:
-                            os.remove(os.path.join(self.log_dir, filename))
+            with os.scandir(self.log_dir) as it:
+                for entry in it:
+                    filename = entry.name
+                    if filename.startswith("sensors_") and filename.endswith(".csv"):
+                        date_str = filename[len("sensors_"):-len(".csv")]
+                        if (len(date_str) == 10 and date_str[4] == date_str[7] == "-"
+                                and date_str <= cutoff_str):
+                            os.remove(entry.path)
                             deleted_count += 1
                             print(f"🗑️  삭제됨: {filename}")
-                    except ValueError:
-                        continue
         except Exception as e:
             print(f"❌ 로그 정리 실패: {e}")
         return deleted_count
@@ -267,11 +424,12 @@ class DataLogger:
     def get_log_files(self) -> List[Tuple[str, int]]:
         files = []
         try:
-            for filename in sorted(os.listdir(self.log_dir)):
-                if filename.startswith("sensors_") and filename.endswith(".csv"):
-                    filepath = os.path.join(self.log_dir, filename)
-                    size     = os.path.getsize(filepath)
-                    files.append((filename, size))
+            with os.scandir(self.log_dir) as it:
+                for entry in it:
+                    if (entry.name.startswith("sensors_") and entry.name.endswith(".csv")
+                            and entry.is_file()):
+                        files.append((entry.name, entry.stat().st_size))
+            files.sort()
         except Exception as e:
             print(f"❌ 파일 목록 조회 실패: {e}")
         return files
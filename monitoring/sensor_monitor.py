@@ -9,9 +9,12 @@ sensor_monitor.py
 - ✅ 마지막 측정값 캐시 (get_current_status 최적화)
 """
 
+import json
+import os
 import time
 import threading
-from datetime import datetime
+from collections import deque
+from itertools import islice
 from typing import Optional, Callable, Dict, List
 import logging
 _log = logging.getLogger(__name__)
@@ -27,6 +30,23 @@ sys.path.append(str(_BASE_DIR))
 from hardware.sensor_reader import SensorReader
 from hardware.rtc_manager import RTCManager
 
+try:
+    import orjson as _orjson    # 선택 의존성: 있으면 더 빠른 파서 사용
+except ImportError:
+    _orjson = None
+
+def trim_mean(values: List[float], k: int) -> float:
+    """
+    상하위 k개씩 제거한 평균 (values 는 제자리 정렬됨)
+    샘플이 2k개 이하이면 제거 없이 전체 평균
+    """
+    values.sort()
+    n = len(values)
+    if k and n > k * 2:
+        return sum(values[k:n - k]) / (n - k * 2)
+    return sum(values) / n
+
+
 class SensorMonitor:
     """센서 실시간 모니터링 클래스"""
     
@@ -70,8 +90,12 @@ class SensorMonitor:
         self.running = False
         self.monitor_thread = None
         
-        # 센서 데이터 히스토리
-        self.history = []
+        # 센서 데이터 히스토리 (고정 크기 링 버퍼, 최대 100개 저장)
+        self.max_history = 100
+        self.history = deque(maxlen=self.max_history)
+        # 히스토리 전체 평균용 누적 합계 / 유효(None 아닌) 개수
+        self._level_sums   = {'tank1_level': 0.0, 'tank2_level': 0.0}
+        self._level_counts = {'tank1_level': 0, 'tank2_level': 0}
         
         # 🔥 샘플링 캐시 (중복 샘플링 방지)
         self._cache = {
@@ -79,14 +103,13 @@ class SensorMonitor:
             'data': None,
             'ttl': 5  # 캐시 유효 시간 (초)
         }
-        self.max_history = 100  # 최대 100개 저장
         
         # ✅ 마지막 측정값 캐시 추가
+        # dict 전체를 참조 교체만 하므로 락 불필요 (CPython GIL 하에서 대입은 원자적)
         self._last_data = None
-        self._last_data_lock = __import__('threading').Lock()
         
         # ✅ 캘리브레이션 로드 (초기화 시)
-        import os
+        self._calib_key = None      # 마지막으로 읽은 파일 (mtime_ns, size, inode) — 변경 없으면 재파싱 생략
         config_path = os.path.join(
             os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
             'config', 'sensor_calibration.json'
@@ -101,7 +124,7 @@ class SensorMonitor:
             self.tank1_full = 3.3
             self.tank2_empty = 0.0
             self.tank2_full = 3.3
-        self._last_data_lock = threading.Lock()
+            self._update_level_params()
         
         # 마지막 알림 시간 (중복 방지)
         self.last_alert_time = {}
@@ -167,9 +190,8 @@ class SensorMonitor:
                 # 센서 데이터 수집 (다중 샘플링 + 이상치 제거)
                 data = self._collect_sensor_data()
                 
-                # ✅ 캐시에 저장
-                with self._last_data_lock:
-                    self._last_data = data
+                # ✅ 캐시에 저장 (참조 교체)
+                self._last_data = data
                 
                 # 히스토리에 추가
                 self._add_to_history(data)
@@ -191,11 +213,15 @@ class SensorMonitor:
         check_interval 동안 균등하게 샘플링
         """
         # 다중 샘플링 (BUG-14: None 샘플 허용)
-        voltage_samples = []
+        # 읽는 즉시 채널별 리스트에 분배 → 이후 채널마다 재수집하지 않음
+        ch_samples = ([], [], [], [])
 
         for i in range(self.sample_count):
             voltages = self.sensor_reader.read_all_channels()
-            voltage_samples.append(voltages)  # None 포함 가능
+            if voltages is not None:
+                for values, v in zip(ch_samples, voltages):
+                    if v is not None:
+                        values.append(v)
 
             # 마지막 샘플 후에는 대기 안 함
             if i < self.sample_count - 1:
@@ -204,12 +230,8 @@ class SensorMonitor:
         # 채널별로 이상치 제거 후 평균 (BUG-14: None 필터링)
         filtered_voltages = []
         all_channels_failed = True
-
-        for ch in range(4):
-            # None 제외한 유효 샘플만 추출
-            ch_values = [s[ch] for s in voltage_samples
-                         if s is not None and s[ch] is not None]
-
+        k = self.outlier_remove
+        for ch, ch_values in enumerate(ch_samples):
             if len(ch_values) < self.min_valid_samples:
                 _log.warning(
                     f'[SensorMonitor] CH{ch} 유효 샘플 부족: '
@@ -220,127 +242,100 @@ class SensorMonitor:
 
             all_channels_failed = False
 
-            # 정렬
-            ch_values.sort()
-
-            # 상하위 제거 (샘플이 충분할 때만)
-            if len(ch_values) > self.outlier_remove * 2:
-                trimmed = ch_values[self.outlier_remove:-self.outlier_remove]
-            else:
-                trimmed = ch_values
-
-            # 평균 계산 (소수점 3자리 반올림)
-            avg = sum(trimmed) / len(trimmed)
-            filtered_voltages.append(round(avg, 3))
+            # 이상치 제거 평균 (소수점 3자리 반올림)
+            filtered_voltages.append(round(trim_mean(ch_values, k), 3))
 
         # 전체 채널 실패 시 예외 → _monitor_loop 에서 10초 후 재시도
         if all_channels_failed:
             raise SensorReadError('모든 채널 유효 샘플 없음 — I2C 연결 확인 필요')
 
-        # 타임스탬프
-        timestamp = self.rtc.get_datetime_string('%Y-%m-%d %H:%M:%S')
+        # 타임스탬프 — 문자열(표시/전송용)과 datetime(로깅용)을 한 번에
+        timestamp_dt = self.rtc.now()
+        timestamp    = timestamp_dt.strftime('%Y-%m-%d %H:%M:%S')
         
         # ✅ 필터링된 전압으로 직접 수위 계산 (캘리브레이션 즉시 반영!)
-        # CH0 = 탱크1, CH1 = 탱크2
-        tank1_voltage = filtered_voltages[0]
-        tank2_voltage = filtered_voltages[1]
-        
-        # 🔥 최신 캘리브레이션 값 읽기
-        tank1_empty = self.tank1_empty
-        tank1_full = self.tank1_full
-        tank2_empty = self.tank2_empty
-        tank2_full = self.tank2_full
-        
-        # 탱크1 수위 계산 (BUG-14: None 전압 → None 수위)
-        if tank1_voltage is None:
-            tank1_level = None
-        elif tank1_voltage <= tank1_empty:
-            tank1_level = 0.0
-        elif tank1_voltage >= tank1_full:
-            tank1_level = 100.0
-        else:
-            tank1_level = round(((tank1_voltage - tank1_empty) / (tank1_full - tank1_empty)) * 100, 1)
-
-        # 탱크2 수위 계산 (BUG-14: None 전압 → None 수위)
-        if tank2_voltage is None:
-            tank2_level = None
-        elif tank2_voltage <= tank2_empty:
-            tank2_level = 0.0
-        elif tank2_voltage >= tank2_full:
-            tank2_level = 100.0
-        else:
-            tank2_level = round(((tank2_voltage - tank2_empty) / (tank2_full - tank2_empty)) * 100, 1)
+        # CH0 = 탱크1, CH1 = 탱크2 (BUG-14: None 전압 → None 수위)
+        tank1_level = self.voltage_to_level(filtered_voltages[0], 1)
+        tank2_level = self.voltage_to_level(filtered_voltages[1], 2)
         
         data = {
             'timestamp': timestamp,
+            'timestamp_dt': timestamp_dt,
             'voltages': filtered_voltages,
             'tank1_level': tank1_level,
             'tank2_level': tank2_level,
         }
         
-        # ✅ 캐시 업데이트
-        with self._last_data_lock:
-            self._last_data = data.copy()
-        
         return data
     
     def _add_to_history(self, data: Dict):
-        """히스토리에 데이터 추가"""
+        """히스토리에 데이터 추가 (평균용 누적 합계도 함께 갱신)"""
+        # 가득 찬 상태면 append 시 가장 오래된 항목이 자동 제거됨
+        if len(self.history) == self.history.maxlen:
+            self._update_level_sums(self.history[0], -1)
         self.history.append(data)
-        
-        # 최대 개수 유지
-        if len(self.history) > self.max_history:
-            self.history.pop(0)
+        self._update_level_sums(data, 1)
+
+    def _update_level_sums(self, data: Dict, sign: int):
+        for key in self._level_sums:
+            level = data.get(key)
+            if level is not None:
+                self._level_sums[key]   += sign * level
+                self._level_counts[key] += sign
     
     def _check_thresholds(self, data: Dict):
-        """임계값 체크 및 알림"""
+        """임계값 체크 및 알림 (쿨다운 중이면 메시지 포맷 생략)"""
         tank1_level = data['tank1_level']
         tank2_level = data['tank2_level']
         
         # 수위 부족 체크
-        if tank1_level < self.min_water_level:
-            self._trigger_alert(
-                alert_type='low_water_level',
-                message=f"⚠️  탱크 1 수위 부족: {tank1_level:.1f}% (최소: {self.min_water_level}%)",
-                data=data
-            )
-        
-        if tank2_level < self.min_water_level:
-            self._trigger_alert(
-                alert_type='low_water_level',
-                message=f"⚠️  탱크 2 수위 부족: {tank2_level:.1f}% (최소: {self.min_water_level}%)",
-                data=data
-            )
+        if not self._is_in_cooldown('low_water_level'):
+            if tank1_level < self.min_water_level:
+                self._trigger_alert(
+                    alert_type='low_water_level',
+                    message=f"⚠️  탱크 1 수위 부족: {tank1_level:.1f}% (최소: {self.min_water_level}%)",
+                    data=data
+                )
+            
+            if tank2_level < self.min_water_level:
+                self._trigger_alert(
+                    alert_type='low_water_level',
+                    message=f"⚠️  탱크 2 수위 부족: {tank2_level:.1f}% (최소: {self.min_water_level}%)",
+                    data=data
+                )
         
         # 수위 과다 체크 (오버플로우 방지)
-        if tank1_level > self.max_water_level:
-            self._trigger_alert(
-                alert_type='high_water_level',
-                message=f"⚠️  탱크 1 수위 과다: {tank1_level:.1f}% (최대: {self.max_water_level}%)",
-                data=data
-            )
-        
-        if tank2_level > self.max_water_level:
-            self._trigger_alert(
-                alert_type='high_water_level',
-                message=f"⚠️  탱크 2 수위 과다: {tank2_level:.1f}% (최대: {self.max_water_level}%)",
-                data=data
-            )
+        if not self._is_in_cooldown('high_water_level'):
+            if tank1_level > self.max_water_level:
+                self._trigger_alert(
+                    alert_type='high_water_level',
+                    message=f"⚠️  탱크 1 수위 과다: {tank1_level:.1f}% (최대: {self.max_water_level}%)",
+                    data=data
+                )
+            
+            if tank2_level > self.max_water_level:
+                self._trigger_alert(
+                    alert_type='high_water_level',
+                    message=f"⚠️  탱크 2 수위 과다: {tank2_level:.1f}% (최대: {self.max_water_level}%)",
+                    data=data
+                )
+    
+    def _is_in_cooldown(self, alert_type: str) -> bool:
+        """알림 쿨다운 여부 (중복 알림 방지)"""
+        last_time = self.last_alert_time.get(alert_type, 0)
+        return time.time() - last_time < self.alert_cooldown
     
     def _trigger_alert(self, alert_type: str, message: str, data: Dict):
         """알림 트리거"""
         # 쿨다운 체크 (중복 알림 방지)
-        now = time.time()
-        last_time = self.last_alert_time.get(alert_type, 0)
-        
-        if now - last_time < self.alert_cooldown:
+        if self._is_in_cooldown(alert_type):
             return  # 쿨다운 중
         
         # 알림 출력
         print(f"\n🔔 {message}")
         
         # 마지막 알림 시간 업데이트
-        self.last_alert_time[alert_type] = now
+        self.last_alert_time[alert_type] = time.time()
         
         # 콜백 실행
         for callback in self.alert_callbacks:
@@ -362,14 +357,23 @@ class SensorMonitor:
         print(f"   CH0: {voltages[0]:.3f}V | CH1: {voltages[1]:.3f}V | "
               f"CH2: {voltages[2]:.3f}V | CH3: {voltages[3]:.3f}V")
     
-    def load_calibration(self, config_path):
-        """캘리브레이션 설정 다시 로드"""
+    def load_calibration(self, config_path, force=False):
+        """
+        캘리브레이션 설정 다시 로드
+
+        파일 (mtime_ns, size, inode) 가 그대로면 생략. mtime 해상도가 거친 파일시스템에서도
+        os.replace 로 교체된 파일은 inode 가 바뀌므로 감지됨. force=True 면 항상 다시 읽음
+        """
         try:
-            import json
+            st = os.stat(config_path)
+            key = (st.st_mtime_ns, st.st_size, st.st_ino)
+            if not force and key == self._calib_key:
+                return True
             # print(f"🔍 캘리브레이션 파일 읽기 시작: {config_path}")  # 디버그용
             
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            with open(config_path, 'rb') as f:
+                raw = f.read()
+            config = _orjson.loads(raw) if _orjson else json.loads(raw)
             
             # print(f"🔍 JSON 파싱 완료: {list(config.keys())}")  # 디버그용
             
@@ -382,6 +386,8 @@ class SensorMonitor:
             self.tank1_full = float(tank1.get('full_value', 3.3))
             self.tank2_empty = float(tank2.get('empty_value', 0.0))
             self.tank2_full = float(tank2.get('full_value', 3.3))
+            self._update_level_params()
+            self._calib_key = key
             
             print(f"✅ 캘리브레이션 재로드 완료!")
             print(f"   센서 타입: {self.sensor_type}")
@@ -402,17 +408,42 @@ class SensorMonitor:
             traceback.print_exc()
             return False
     
+    def _update_level_params(self):
+        """캘리브레이션 로드 시 탱크별 (empty, 100/(full-empty)) 1회 계산"""
+        def scale(empty, full):
+            # full == empty 이면 inf → 아래 clamp 로 0% / 100% 로 수렴
+            return 100.0 / (full - empty) if full != empty else float('inf')
+        self._level_params = {
+            1: (self.tank1_empty, scale(self.tank1_empty, self.tank1_full)),
+            2: (self.tank2_empty, scale(self.tank2_empty, self.tank2_full)),
+        }
+
+    def voltage_to_level(self, voltage: Optional[float], tank_num: int) -> Optional[float]:
+        """
+        전압 → 수위(%) 변환 (0~100 범위로 clamp, 소수점 1자리)
+        
+        Args:
+            voltage: 필터링된 전압 (None 이면 None 반환)
+            tank_num: 탱크 번호 (1 또는 2)
+        """
+        if voltage is None:
+            return None
+        empty, scale = self._level_params[tank_num]
+        return round(min(100.0, max(0.0, (voltage - empty) * scale)), 1)
+
     def get_current_status(self) -> Dict:
         """
         현재 센서 상태 조회
         
         ✅ 캐시된 마지막 측정값을 반환 (새로 샘플링 안 함)
         캐시가 없으면 즉시 1회 측정
+        캐시 dict 는 게시 후 수정되지 않으므로 복사 없이 반환 (호출측 수정 금지)
         """
-        with self._last_data_lock:
-            if self._last_data:
-                # 캐시된 값 반환 (샘플링 안 함)
-                return self._last_data.copy()
+        # 참조를 한 번만 읽어 두면 도중에 교체되어도 일관된 스냅샷
+        d = self._last_data
+        if d:
+            # 캐시된 값 반환 (샘플링 안 함)
+            return d
         
         # 캐시가 없으면 즉시 측정 (모니터링 시작 전)
         return self._collect_sensor_data()
@@ -428,9 +459,13 @@ class SensorMonitor:
             센서 데이터 리스트
         """
         if limit:
-            return self.history[-limit:]
-        return self.history.copy()
+            return self._tail(limit)
+        return list(self.history)
     
+    def _tail(self, n: int) -> List[Dict]:
+        """히스토리 마지막 n개 (deque 전체 복사 없이)"""
+        return list(islice(self.history, max(0, len(self.history) - n), None))
+
     def get_average_levels(self, count: Optional[int] = None) -> Dict:
         """
         최근 N개 데이터의 평균 수위 계산
@@ -444,19 +479,23 @@ class SensorMonitor:
         if not self.history:
             return {'tank1': 0.0, 'tank2': 0.0, 'count': 0}
         
-        # 최근 데이터만 가져오기
-        if count:
-            recent = self.history[-count:]
+        # 전체 평균은 누적 합계로 O(1) 계산
+        if not count or count >= len(self.history):
+            sums, counts = self._level_sums, self._level_counts
+            actual_count = len(self.history)
         else:
-            recent = self.history
-        
-        actual_count = len(recent)
-        tank1_sum = sum(d['tank1_level'] for d in recent)
-        tank2_sum = sum(d['tank2_level'] for d in recent)
+            sums   = {'tank1_level': 0.0, 'tank2_level': 0.0}
+            counts = {'tank1_level': 0, 'tank2_level': 0}
+            for d in self._tail(count):
+                for key in sums:
+                    if d.get(key) is not None:
+                        sums[key]   += d[key]
+                        counts[key] += 1
+            actual_count = count
         
         return {
-            'tank1': tank1_sum / actual_count,
-            'tank2': tank2_sum / actual_count,
+            'tank1': sums['tank1_level'] / counts['tank1_level'] if counts['tank1_level'] else 0.0,
+            'tank2': sums['tank2_level'] / counts['tank2_level'] if counts['tank2_level'] else 0.0,
             'count': actual_count
         }
     
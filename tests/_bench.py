@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+_bench.py
+하드웨어 테스트 스크립트 공통 헬퍼
+- 시작 배너 출력 + 예외 발생 시 실패 메시지/문제 해결 안내 출력
+"""
+
+import functools
+import inspect
+import sys
+import time
+
+BANNER_WIDTH = 50
+
+# 터미널이면 \r 로 같은 줄을 덮어쓰고, 파이프/로그 파일이면 줄 단위로 출력
+_IN_PLACE = sys.stdout.isatty()
+_line_open = False
+
+def progress(line):
+    """진행 상황 한 줄 갱신"""
+    global _line_open
+    if _IN_PLACE:
+        sys.stdout.write(f"\r{line}\x1b[K")
+        _line_open = True
+    else:
+        sys.stdout.write(line + "\n")
+    sys.stdout.flush()
+
+def progress_done():
+    """현재 진행 줄을 확정 (다음 출력은 새 줄에서 시작)"""
+    global _line_open
+    if _line_open:
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+        _line_open = False
+
+def fixed_cadence(count, period=1.0):
+    """
+    0..count-1 을 period 간격으로 yield
+    
+    time.sleep(period) 와 달리 본문 실행 시간만큼 주기가 밀리지 않음
+    (다음 시각을 누적해서 계산)
+    """
+    next_t = time.monotonic()
+    for i in range(count):
+        yield i
+        next_t += period
+        dt = next_t - time.monotonic()
+        if dt > 0:
+            time.sleep(dt)
+
+def with_banner(title, hints="", failure="테스트 실패"):
+    """
+    테스트 함수 데코레이터
+
+    Args:
+        title: 배너 제목 (예: "🧪 ADS1115 ADC 테스트").
+               hints 처럼 {relay_count} 등 테스트 함수 인자로 채울 수 있음
+        hints: 예외 발생 시 출력할 문제 해결 안내.
+               {address} 처럼 테스트 함수 인자 이름으로 값을 채울 수 있음
+        failure: 실패 메시지 접두어
+
+    예외가 발생하면 안내를 출력하고 False 반환
+    """
+    rule = "=" * BANNER_WIDTH
+    banner = "{rule}\n{title}\n{rule}\n\n"
+    templated = "{" in title
+    if not templated:
+        banner = banner.format(rule=rule, title=title)
+
+    def deco(fn):
+        sig = inspect.signature(fn)
+
+        def arguments(args, kwargs):
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return bound.arguments
+
+        @functools.wraps(fn)
+        def wrap(*args, **kwargs):
+            if templated:
+                sys.stdout.write(banner.format(
+                    rule=rule, title=title.format_map(arguments(args, kwargs))))
+            else:
+                sys.stdout.write(banner)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                msg = f"\n❌ {failure}: {e}\n"
+                if hints:
+                    msg += "\n" + hints.format_map(arguments(args, kwargs)) + "\n"
+                sys.stdout.write(msg)
+                sys.stdout.flush()
+                return False
+        return wrap
+    return deco
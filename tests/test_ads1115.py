@@ -4,86 +4,114 @@ test_ads1115.py
 ADS1115 ADC 테스트 (v3.x 호환)
 """
 
+import struct
 import board
 import busio
 import adafruit_ads1x15.ads1115 as ADS
-from adafruit_ads1x15.analog_in import AnalogIn
-import time
+from adafruit_ads1x15.ads1x15 import Mode
+from adafruit_ads1x15.analog_in import AnalogIn, _ADS1X15_PGA_RANGE
+from _bench import fixed_cadence, progress, progress_done, with_banner
 
+# I2C Fast-mode (400kHz). 라즈베리파이에서는 실제 버스 속도가
+# /boot/firmware/config.txt 의 dtparam=i2c_arm_baudrate=400000 설정으로 결정됨
+I2C_FREQUENCY = 400_000
+
+# 프로그레스 바 (매 샘플마다 문자열을 새로 만들지 않고 슬라이스로 재사용)
+BAR_LENGTH = 30
+_BAR_FULL = "█" * BAR_LENGTH
+_BAR_EMPTY = "░" * BAR_LENGTH
+_BAR_PER_VOLT = BAR_LENGTH / 3.3
+
+# 변환 레지스터(0x00) 직접 읽기용 버퍼 (샘플마다 할당하지 않음)
+_CONVERSION_REG = bytes([0x00])
+_READ_BUF = bytearray(2)
+
+_WIRING_HINTS = """🔍 배선 확인:
+   VDD → 3.3V (Pin 1)
+   GND → GND (Pin 6)
+   SDA → GPIO2 (Pin 3)
+   SCL → GPIO3 (Pin 5)
+   ADDR → GND"""
+
+def read_conversion(i2c, address):
+    """변환 레지스터 raw 값 (드라이버 객체를 거치지 않고 I2C 한 트랜잭션)"""
+    i2c.writeto_then_readfrom(address, _CONVERSION_REG, _READ_BUF)
+    return struct.unpack(">h", _READ_BUF)[0]
+
+@with_banner("🧪 ADS1115 ADC 테스트", hints=_WIRING_HINTS)
 def test_ads1115(address=0x48, channel=0, duration=10):
-    print("=" * 50)
-    print("🧪 ADS1115 ADC 테스트")
-    print("=" * 50)
+    # I2C 초기화
+    print("1️⃣ I2C 초기화 중...")
+    i2c = busio.I2C(board.SCL, board.SDA, frequency=I2C_FREQUENCY)
+    print("   ✓ I2C 초기화 성공")
+    print()
+    
+    # ADS1115 연결
+    print(f"2️⃣ ADS1115 연결 중... (주소: 0x{address:02X})")
+    ads = ADS.ADS1115(i2c, address=address)
+    # 연속 변환 모드: 샘플마다 config 쓰기 + 변환 완료 폴링 없이 변환 레지스터만 읽음
+    ads.mode = Mode.CONTINUOUS
+    ads.data_rate = 860
+    print(f"   ✓ ADS1115 (0x{address:02X}) 연결 성공 (연속 변환, 860 SPS)")
     print()
     
+    # 채널 설정
+    print(f"3️⃣ 채널 {channel} 설정 중...")
+    
+    # 채널 핀 매핑 (v3.x 호환)
+    channels = {
+        0: ADS.P0,
+        1: ADS.P1,
+        2: ADS.P2,
+        3: ADS.P3
+    }
+    
+    if channel not in channels:
+        print(f"   ❌ 잘못된 채널: {channel} (0-3만 가능)")
+        return False
+    
+    chan = AnalogIn(ads, channels[channel])
+    print(f"   ✓ 채널 {channel} 설정 완료")
+    print()
+    
+    # 전압 측정
+    print(
+        f"4️⃣ 전압 측정 ({duration}초)\n"
+        "\n"
+        "   📊 측정 시작...\n"
+        f"   {'-' * 45}"
+    )
+    
+    # raw → 전압 환산 계수 (게인 고정이므로 루프 밖에서 한 번만 계산)
+    volts_per_count = _ADS1X15_PGA_RANGE[ads.gain] / 32767
+    
+    # 첫 읽기는 드라이버로 - 채널(MUX) 설정을 쓰고 연속 변환 시작
+    chan.value
+    
+    while not i2c.try_lock():
+        pass
     try:
-        # I2C 초기화
-        print("1️⃣ I2C 초기화 중...")
-        i2c = busio.I2C(board.SCL, board.SDA)
-        print("   ✓ I2C 초기화 성공")
-        print()
-        
-        # ADS1115 연결
-        print(f"2️⃣ ADS1115 연결 중... (주소: 0x{address:02X})")
-        ads = ADS.ADS1115(i2c, address=address)
-        print(f"   ✓ ADS1115 (0x{address:02X}) 연결 성공")
-        print()
-        
-        # 채널 설정
-        print(f"3️⃣ 채널 {channel} 설정 중...")
-        
-        # 채널 핀 매핑 (v3.x 호환)
-        channels = {
-            0: ADS.P0,
-            1: ADS.P1,
-            2: ADS.P2,
-            3: ADS.P3
-        }
-        
-        if channel not in channels:
-            print(f"   ❌ 잘못된 채널: {channel} (0-3만 가능)")
-            return False
-        
-        chan = AnalogIn(ads, channels[channel])
-        print(f"   ✓ 채널 {channel} 설정 완료")
-        print()
+        for i in fixed_cadence(duration):
+            value = read_conversion(i2c, address)  # 한 번만 읽고 전압은 같은 raw 값에서 계산
+            voltage = value * volts_per_count
         
-        # 전압 측정
-        print(f"4️⃣ 전압 측정 ({duration}초)")
-        print()
-        print("   📊 측정 시작...")
-        print("   " + "-" * 45)
-        
-        for i in range(duration):
-            voltage = chan.voltage
-            value = chan.value
-            
             # 프로그레스 바
-            bar_length = 30
-            bar_filled = int((voltage / 3.3) * bar_length)
-            bar = "█" * bar_filled + "░" * (bar_length - bar_filled)
+            bar_filled = min(BAR_LENGTH, max(0, int(voltage * _BAR_PER_VOLT)))
+            bar = _BAR_FULL[:bar_filled] + _BAR_EMPTY[bar_filled:]
             
-            print(f"   [{i+1:2d}/{duration:2d}] {voltage:.3f}V |{bar}| ({value:5d})")
-            time.sleep(1)
-        
-        print("   " + "-" * 45)
-        print()
-        print("=" * 50)
-        print("✅ ADS1115 테스트 완료!")
-        print("=" * 50)
-        return True
-        
-    except Exception as e:
-        print()
-        print(f"❌ 테스트 실패: {e}")
-        print()
-        print("🔍 배선 확인:")
-        print("   VDD → 3.3V (Pin 1)")
-        print("   GND → GND (Pin 6)")
-        print("   SDA → GPIO2 (Pin 3)")
-        print("   SCL → GPIO3 (Pin 5)")
-        print("   ADDR → GND")
-        return False
+            progress(f"   [{i+1:2d}/{duration:2d}] {voltage:.3f}V |{bar}| ({value:5d})")
+    finally:
+        i2c.unlock()
+        progress_done()
+    
+    print(
+        f"   {'-' * 45}\n"
+        "\n"
+        f"{'=' * 50}\n"
+        "✅ ADS1115 테스트 완료!\n"
+        f"{'=' * 50}"
+    )
+    return True
 
 if __name__ == '__main__':
     test_ads1115(address=0x48, channel=0, duration=10)
@@ -9,27 +9,31 @@ test_all_i2c_modules.py
 
 import board
 import busio
-from test_mcp23017 import test_mcp23017
+import errno
 import time
 
-def scan_i2c():
+# I2C Fast-mode (400kHz). 라즈베리파이에서는 실제 버스 속도가
+# /boot/firmware/config.txt 의 dtparam=i2c_arm_baudrate=400000 설정으로 결정됨
+# (DS1307 은 규격상 100kHz 장치 - RTC 테스트만 실패하면 100_000 으로 낮춰 확인)
+I2C_FREQUENCY = 400_000
+
+# 주소에 ACK 가 없을 때 i2c-dev 가 돌려주는 errno (이 외의 실패는 어댑터 측 문제로 봄)
+_NO_ACK_ERRNOS = {errno.ENXIO, errno.EREMOTEIO}
+
+def scan_i2c(i2c=None):
     """I2C 장치 스캔"""
-    print("\n" + "="*60)
-    print("🔍 I2C 장치 스캔")
-    print("="*60)
+    print(
+        f"\n{'=' * 60}\n"
+        "🔍 I2C 장치 스캔\n"
+        f"{'=' * 60}"
+    )
     
     try:
-        i2c = busio.I2C(board.SCL, board.SDA)
-        
-        # I2C 스캔
-        while not i2c.try_lock():
-            pass
-        
-        devices = i2c.scan()
-        i2c.unlock()
-        
-        print(f"\n발견된 I2C 장치: {len(devices)}개")
+        if i2c is None:
+            i2c = busio.I2C(board.SCL, board.SDA, frequency=I2C_FREQUENCY)
         
+        # 프로젝트 장치 주소만 탐지 (112개 주소 전체 스캔 대신 4회 probe,
+        # 예약 주소나 관계없는 장치를 건드리지 않음)
         device_map = {
             0x20: "MCP23017 #1",
             0x21: "MCP23017 #2",
@@ -37,9 +41,33 @@ def scan_i2c():
             0x68: "RTC DS1307"
         }
         
+        probe = bytearray(1)
+        devices = []
+        while not i2c.try_lock():
+            pass
+        try:
+            for addr in device_map:
+                # SMBus quick write (주소 + ACK 만 확인, 데이터 없음)
+                # 읽기 probe 와 달리 장치 내부 상태를 바꾸지 않음
+                try:
+                    i2c.writeto(addr, b"", stop=True)
+                    devices.append(addr)
+                except OSError as e:
+                    if e.errno in _NO_ACK_ERRNOS:
+                        continue   # 응답 없음
+                    # 0 바이트 메시지를 거부하는 어댑터 → 1 바이트 읽기 probe 로 재시도
+                    try:
+                        i2c.readfrom_into(addr, probe)
+                        devices.append(addr)
+                    except OSError:
+                        pass
+        finally:
+            i2c.unlock()
+        
+        print(f"\n발견된 I2C 장치: {len(devices)}/{len(device_map)}개")
+        
         for addr in devices:
-            name = device_map.get(addr, "알 수 없는 장치")
-            print(f"  • 0x{addr:02X}: {name}")
+            print(f"  • 0x{addr:02X}: {device_map[addr]}")
         
         return devices
         
@@ -47,39 +75,47 @@ def scan_i2c():
         print(f"\n❌ I2C 스캔 실패: {e}")
         return []
 
-def test_mcp23017_both():
+def test_mcp23017_both(i2c=None):
     """MCP23017 x2 테스트"""
-    print("\n" + "="*60)
-    print("🧪 MCP23017 GPIO 확장 보드 테스트")
-    print("="*60)
+    # 드라이버(adafruit_mcp230xx, digitalio)는 이 테스트에서만 필요하므로 지연 import
+    from test_mcp23017 import test_mcp23017
+    
+    print(
+        f"\n{'=' * 60}\n"
+        "🧪 MCP23017 GPIO 확장 보드 테스트\n"
+        f"{'=' * 60}"
+    )
     
     results = {}
     
     # MCP23017 #1 (0x20)
     print("\n📍 MCP23017 #1 (0x20) 테스트")
     print("-"*60)
-    results['MCP #1'] = test_mcp23017(address=0x20, pin_num=0, test_count=2)
+    results['MCP #1'] = test_mcp23017(address=0x20, pin_num=0, test_count=2, i2c=i2c)
     
     time.sleep(1)
     
     # MCP23017 #2 (0x21)
     print("\n📍 MCP23017 #2 (0x21) 테스트")
     print("-"*60)
-    results['MCP #2'] = test_mcp23017(address=0x21, pin_num=0, test_count=2)
+    results['MCP #2'] = test_mcp23017(address=0x21, pin_num=0, test_count=2, i2c=i2c)
     
     return results
 
-def test_ads1115():
+def test_ads1115(i2c=None):
     """ADS1115 ADC 테스트"""
-    print("\n" + "="*60)
-    print("🧪 ADS1115 ADC 테스트")
-    print("="*60)
+    print(
+        f"\n{'=' * 60}\n"
+        "🧪 ADS1115 ADC 테스트\n"
+        f"{'=' * 60}"
+    )
     
     try:
         import adafruit_ads1x15.ads1115 as ADS
         from adafruit_ads1x15.analog_in import AnalogIn
         
-        i2c = busio.I2C(board.SCL, board.SDA)
+        if i2c is None:
+            i2c = busio.I2C(board.SCL, board.SDA, frequency=I2C_FREQUENCY)
         ads = ADS.ADS1115(i2c, address=0x48)
         
         print("\n✓ ADS1115 (0x48) 연결 성공")
@@ -94,17 +130,20 @@ def test_ads1115():
         print(f"\n❌ ADS1115 테스트 실패: {e}")
         return False
 
-def test_rtc():
+def test_rtc(i2c=None):
     """RTC DS1307 테스트"""
-    print("\n" + "="*60)
-    print("🧪 RTC DS1307 테스트")
-    print("="*60)
+    print(
+        f"\n{'=' * 60}\n"
+        "🧪 RTC DS1307 테스트\n"
+        f"{'=' * 60}"
+    )
     
     try:
         import adafruit_ds1307
         import datetime
         
-        i2c = busio.I2C(board.SCL, board.SDA)
+        if i2c is None:
+            i2c = busio.I2C(board.SCL, board.SDA, frequency=I2C_FREQUENCY)
         rtc = adafruit_ds1307.DS1307(i2c)
         
         print("\n✓ RTC DS1307 (0x68) 연결 성공")
@@ -121,14 +160,23 @@ def test_rtc():
 
 def main():
     """전체 테스트 실행"""
-    print("\n" + "="*60)
-    print("🚀 스마트 관수 시스템 - I2C 모듈 통합 테스트")
-    print("="*60)
+    print(
+        f"\n{'=' * 60}\n"
+        "🚀 스마트 관수 시스템 - I2C 모듈 통합 테스트\n"
+        f"{'=' * 60}"
+    )
     
     results = {}
     
+    # I2C 버스는 한 번만 열어 모든 테스트에서 공유
+    try:
+        i2c = busio.I2C(board.SCL, board.SDA, frequency=I2C_FREQUENCY)
+    except Exception as e:
+        print(f"\n❌ I2C 초기화 실패: {e}")
+        return False
+    
     # 1. I2C 스캔
-    devices = scan_i2c()
+    devices = scan_i2c(i2c)
     
     if not devices:
         print("\n❌ I2C 장치를 찾을 수 없습니다!")
@@ -137,23 +185,25 @@ def main():
     time.sleep(2)
     
     # 2. MCP23017 x2 테스트
-    mcp_results = test_mcp23017_both()
+    mcp_results = test_mcp23017_both(i2c)
     results.update(mcp_results)
     
     time.sleep(2)
     
     # 3. ADS1115 테스트
-    results['ADS1115'] = test_ads1115()
+    results['ADS1115'] = test_ads1115(i2c)
     
     time.sleep(2)
     
     # 4. RTC 테스트
-    results['RTC DS1307'] = test_rtc()
+    results['RTC DS1307'] = test_rtc(i2c)
     
     # 5. 최종 결과 요약
-    print("\n" + "="*60)
-    print("📊 최종 테스트 결과")
-    print("="*60)
+    print(
+        f"\n{'=' * 60}\n"
+        "📊 최종 테스트 결과\n"
+        f"{'=' * 60}"
+    )
     
     for name, success in results.items():
         status = "✅ 성공" if success else "❌ 실패"
@@ -163,12 +213,14 @@ def main():
     
     print("\n" + "="*60)
     if all_success:
-        print("🎉 모든 I2C 모듈 테스트 성공!")
-        print("\n다음 단계:")
-        print("  1️⃣ 릴레이 모듈 6채널 x4개 구매")
-        print("  2️⃣ 체크밸브 50A x3개 구매")
-        print("  3️⃣ 외부 5V 5A 어댑터 구매")
-        print("  4️⃣ 릴레이 통합 테스트")
+        print(
+            "🎉 모든 I2C 모듈 테스트 성공!\n"
+            "\n다음 단계:\n"
+            "  1️⃣ 릴레이 모듈 6채널 x4개 구매\n"
+            "  2️⃣ 체크밸브 50A x3개 구매\n"
+            "  3️⃣ 외부 5V 5A 어댑터 구매\n"
+            "  4️⃣ 릴레이 통합 테스트"
+        )
     else:
         print("⚠️  일부 모듈 테스트 실패")
         print("   → 실패한 모듈의 배선을 확인하세요")
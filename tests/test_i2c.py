@@ -5,48 +5,85 @@ I2C 장치 스캔 및 확인
 부품이 제대로 연결되었는지 확인하는 첫 번째 테스트
 """
 
-import subprocess
+import board
+import busio
+
+# I2C Fast-mode (400kHz). 라즈베리파이에서는 실제 버스 속도가
+# /boot/firmware/config.txt 의 dtparam=i2c_arm_baudrate=400000 설정으로 결정됨
+I2C_FREQUENCY = 400_000
+
+# 우리 프로젝트 예상 장치
+EXPECTED = {
+    0x20: 'MCP23017 #1 (GPIO 확장)',
+    0x21: 'MCP23017 #2 (GPIO 확장)',
+    0x48: 'ADS1115 (ADC 아날로그 입력)'
+}
+
+# I2C 주소 공간을 주소당 1비트인 정수 비트마스크로 표현
+def to_mask(addresses):
+    """주소 목록 → 비트마스크"""
+    mask = 0
+    for addr in addresses:
+        mask |= 1 << addr
+    return mask
+
+def mask_addresses(mask):
+    """비트마스크 → 주소 목록 (오름차순)"""
+    addresses = []
+    while mask:
+        low = mask & -mask
+        addresses.append(low.bit_length() - 1)
+        mask ^= low
+    return addresses
+
+EXPECTED_MASK = to_mask(EXPECTED)
+# 예약 주소 0x00-0x07, 0x78-0x7F ((addr & 0x78) == 0 또는 0x78)
+RESERVED_MASK = to_mask(a for a in range(128) if (a & 0x78) in (0x00, 0x78))
 
 def scan_i2c():
-    """I2C 버스 스캔"""
-    print("🔍 I2C 장치 스캔 중...")
-    print()
+    """I2C 버스 스캔 (i2cdetect 프로세스 대신 busio 직접 스캔)"""
+    print("🔍 I2C 장치 스캔 중...\n")
     
     try:
-        result = subprocess.run(['i2cdetect', '-y', '1'], 
-                              capture_output=True, text=True)
-        print(result.stdout)
+        i2c = busio.I2C(board.SCL, board.SDA, frequency=I2C_FREQUENCY)
+        while not i2c.try_lock():
+            pass
+        try:
+            devmask = to_mask(i2c.scan()) & ~RESERVED_MASK
+        finally:
+            i2c.unlock()
         
-        # 예상 주소 확인
-        expected = {
-            '20': 'MCP23017 #1 (GPIO 확장)',
-            '21': 'MCP23017 #2 (GPIO 확장)',
-            '48': 'ADS1115 (ADC 아날로그 입력)'
-        }
+        print("발견된 주소: " + (", ".join(f"0x{addr:02X}" for addr in mask_addresses(devmask)) or "없음"))
         
-        print("📋 우리 프로젝트 예상 장치:")
-        found_count = 0
+        lines = ["", "📋 우리 프로젝트 예상 장치:"]
+        found_count = (devmask & EXPECTED_MASK).bit_count()
         
-        for addr, name in expected.items():
-            if addr in result.stdout:
-                print(f"  ✅ 0x{addr}: {name} 발견!")
-                found_count += 1
+        for addr, name in EXPECTED.items():
+            if (devmask >> addr) & 1:
+                lines.append(f"  ✅ 0x{addr:02X}: {name} 발견!")
             else:
-                print(f"  ❌ 0x{addr}: {name} 없음")
+                lines.append(f"  ❌ 0x{addr:02X}: {name} 없음")
+        
+        others = mask_addresses(devmask & ~EXPECTED_MASK)
+        if others:
+            lines.append("  ℹ️  그 외 장치: " + ", ".join(f"0x{addr:02X}" for addr in others))
         
+        print("\n".join(lines))
         print()
         if found_count == 0:
             print("⚠️  아직 부품이 연결되지 않았습니다.")
             print("    부품을 연결하고 다시 실행하세요.")
-        elif found_count == len(expected):
+        elif found_count == len(EXPECTED):
             print("🎉 모든 장치가 정상적으로 연결되었습니다!")
         else:
-            print(f"📊 {found_count}/{len(expected)}개 장치 연결됨")
+            print(f"📊 {found_count}/{len(EXPECTED)}개 장치 연결됨")
             
-    except FileNotFoundError:
-        print("❌ i2cdetect 명령어를 찾을 수 없습니다.")
-        print("   I2C가 활성화되지 않았을 수 있습니다.")
-        print("   sudo raspi-config 에서 I2C를 활성화하세요.")
+    except (RuntimeError, ValueError) as e:
+        print(
+            f"❌ I2C 버스를 열 수 없습니다: {e}\n"
+            "   I2C가 활성화되지 않았을 수 있습니다.\n"
+            "   sudo raspi-config 에서 I2C를 활성화하세요."
+        )
     except Exception as e:
         print(f"❌ 오류 발생: {e}")
 
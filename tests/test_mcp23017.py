@@ -10,8 +10,20 @@ import busio
 from adafruit_mcp230xx.mcp23017 import MCP23017
 from digitalio import Direction
 import time
+from _bench import with_banner
 
-def test_mcp23017(address=0x20, pin_num=0, test_count=5):
+# I2C Fast-mode (400kHz). 라즈베리파이에서는 실제 버스 속도가
+# /boot/firmware/config.txt 의 dtparam=i2c_arm_baudrate=400000 설정으로 결정됨
+I2C_FREQUENCY = 400_000
+
+_TROUBLESHOOT_HINTS = """🔍 문제 해결:
+   1. I2C가 활성화되어 있는지 확인
+      sudo raspi-config → Interface → I2C → Enable
+   2. 라즈베리파이 재부팅
+   3. 권한 확인: 사용자가 i2c 그룹에 속해 있는지"""
+
+@with_banner("🧪 MCP23017 GPIO 확장 보드 테스트", hints=_TROUBLESHOOT_HINTS)
+def test_mcp23017(address=0x20, pin_num=0, test_count=5, i2c=None):
     """
     MCP23017 테스트
     
@@ -19,16 +31,13 @@ def test_mcp23017(address=0x20, pin_num=0, test_count=5):
         address: I2C 주소 (0x20 또는 0x21)
         pin_num: 테스트할 핀 번호 (0-15)
         test_count: 테스트 반복 횟수
+        i2c: 공유할 busio.I2C 인스턴스 (None이면 새로 생성)
     """
-    print("=" * 50)
-    print("🧪 MCP23017 GPIO 확장 보드 테스트")
-    print("=" * 50)
-    print()
-    
     try:
         # I2C 초기화
         print("1️⃣ I2C 초기화 중...")
-        i2c = busio.I2C(board.SCL, board.SDA)
+        if i2c is None:
+            i2c = busio.I2C(board.SCL, board.SDA, frequency=I2C_FREQUENCY)
         print("   ✓ I2C 초기화 성공")
         print()
         
@@ -46,10 +55,11 @@ def test_mcp23017(address=0x20, pin_num=0, test_count=5):
         print()
         
         # LED/릴레이 점멸 테스트
-        print(f"4️⃣ LED/릴레이 점멸 테스트 ({test_count}회)")
-        print("   핀 0에 LED를 연결하세요:")
-        print("   핀0 → 저항(220Ω) → LED → GND")
-        print()
+        print(
+            f"4️⃣ LED/릴레이 점멸 테스트 ({test_count}회)\n"
+            "   핀 0에 LED를 연결하세요:\n"
+            "   핀0 → 저항(220Ω) → LED → GND\n"
+        )
         
         for i in range(test_count):
             print(f"   [{i+1}/{test_count}] 🟢 ON")
@@ -60,36 +70,29 @@ def test_mcp23017(address=0x20, pin_num=0, test_count=5):
             pin.value = False
             time.sleep(1)
         
-        print()
-        print("=" * 50)
-        print("✅ MCP23017 테스트 완료!")
-        print("=" * 50)
+        print(
+            "\n"
+            f"{'=' * 50}\n"
+            "✅ MCP23017 테스트 완료!\n"
+            f"{'=' * 50}"
+        )
         return True
         
     except ValueError as e:
-        print()
-        print("❌ MCP23017을 찾을 수 없습니다!")
-        print()
-        print("🔍 문제 해결 방법:")
-        print(f"   1. i2cdetect -y 1 을 실행하여 0x{address:02X} 주소 확인")
-        print("   2. 배선 확인:")
-        print("      - VDD → 3.3V (Pin 1)")
-        print("      - GND → GND (Pin 6)")
-        print("      - SDA → GPIO 2 (Pin 3)")
-        print("      - SCL → GPIO 3 (Pin 5)")
-        print("      - A0, A1, A2 → GND (주소 0x20으로 설정)")
-        print(f"   3. 주소를 0x21로 바꾸고 싶으면: A0 → 3.3V")
-        return False
-        
-    except Exception as e:
-        print()
-        print(f"❌ 테스트 실패: {e}")
-        print()
-        print("🔍 문제 해결:")
-        print("   1. I2C가 활성화되어 있는지 확인")
-        print("      sudo raspi-config → Interface → I2C → Enable")
-        print("   2. 라즈베리파이 재부팅")
-        print("   3. 권한 확인: 사용자가 i2c 그룹에 속해 있는지")
+        print(
+            "\n"
+            "❌ MCP23017을 찾을 수 없습니다!\n"
+            "\n"
+            "🔍 문제 해결 방법:\n"
+            f"   1. i2cdetect -y 1 을 실행하여 0x{address:02X} 주소 확인\n"
+            "   2. 배선 확인:\n"
+            "      - VDD → 3.3V (Pin 1)\n"
+            "      - GND → GND (Pin 6)\n"
+            "      - SDA → GPIO 2 (Pin 3)\n"
+            "      - SCL → GPIO 3 (Pin 5)\n"
+            "      - A0, A1, A2 → GND (주소 0x20으로 설정)\n"
+            f"   3. 주소를 0x21로 바꾸고 싶으면: A0 → 3.3V"
+        )
         return False
 
 if __name__ == '__main__':
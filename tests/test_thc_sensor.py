@@ -5,9 +5,103 @@ THC-S 토양 센서 (온도/습도/EC) RS485 Modbus 테스트
 센서 1개를 연결하여 데이터 읽기 확인
 """
 
+import asyncio
 import minimalmodbus
+import select
+import statistics
+import struct
 import time
+from _bench import fixed_cadence, progress, progress_done, with_banner
 
+# {address} 는 테스트 함수 인자로 채워짐
+_WIRING_HINTS = """🔍 문제 해결 방법:
+   1. MAX485 배선 확인:
+      - VCC → 5V (Pin 2)
+      - GND → GND (Pin 6)
+      - DI → TX (GPIO 14, Pin 8)
+      - RO → RX (GPIO 15, Pin 10)
+      - DE, RE → GPIO 4 (Pin 7) - 묶어서 연결
+
+   2. THC-S 센서 배선 확인:
+      - 갈색(Brown) → 12V+
+      - 검정(Black) → GND
+      - 노랑(Yellow) → MAX485 A+
+      - 파랑(Blue) → MAX485 B-
+
+   3. 센서 주소 확인:
+      현재 주소: {address}
+      센서 공장 초기값은 주소 1입니다."""
+
+def _open_sensor(port, address):
+    """THC-S Modbus 인스턴스 생성 (같은 포트는 minimalmodbus 가 핸들을 공유)"""
+    sensor = minimalmodbus.Instrument(port, address)
+    sensor.serial.baudrate = 4800
+    sensor.serial.timeout = 1
+    sensor.serial.inter_byte_timeout = 0.05
+    sensor.serial.write_timeout = 0.2
+    # 포트를 계속 열어 두고 트랜잭션마다 버퍼 flush 하지 않음
+    sensor.clear_buffers_before_each_transaction = False
+    sensor.close_port_after_each_call = False
+    return sensor
+
+def _crc16(data):
+    """Modbus RTU CRC16"""
+    crc = 0xFFFF
+    for b in data:
+        crc ^= b
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+# 응답: addr(1) + fc(1) + byte_count(1) + data(6) + crc(2)
+_THC_RESPONSE_LEN = 11
+
+def _read_thc_registers(ser, address, timeout=0.2):
+    """
+    레지스터 0x0000~0x0002 읽기 (FC 0x03)
+    
+    minimalmodbus 의 블로킹 read(serial.timeout 까지 대기) 대신
+    select() 로 응답 바이트가 도착하는 만큼만 기다림
+    """
+    body = struct.pack(">BBHH", address, 0x03, 0x0000, 3)
+    ser.reset_input_buffer()
+    ser.write(body + struct.pack("<H", _crc16(body)))
+    
+    fd = ser.fileno()
+    resp = b""
+    deadline = time.monotonic() + timeout
+    while len(resp) < _THC_RESPONSE_LEN:
+        # 예외 응답 (fc | 0x80): addr + fc + code + crc(2)
+        if len(resp) >= 5 and resp[1] & 0x80:
+            raise IOError(f"Modbus 예외 응답 (코드 0x{resp[2]:02X})")
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+            raise IOError(f"응답 시간 초과 ({len(resp)}/{_THC_RESPONSE_LEN} bytes)")
+        resp += ser.read(ser.in_waiting or 1)
+    
+    resp = resp[:_THC_RESPONSE_LEN]
+    if struct.unpack("<H", resp[-2:])[0] != _crc16(resp[:-2]):
+        raise IOError("CRC 오류")
+    if resp[0] != address or resp[1] != 0x03 or resp[2] != 6:
+        raise IOError(f"잘못된 응답: {resp.hex(' ')}")
+    return struct.unpack(">3H", resp[3:9])
+
+def _read_thc(sensor):
+    """습도/온도/EC 레지스터(0x0000~0x0002)를 한 번의 Modbus 요청으로 읽어 (습도, 온도, EC) 반환"""
+    regs = _read_thc_registers(sensor.serial, sensor.address)
+    
+    # 습도 (소수점 1자리)
+    humidity = regs[0] / 10.0
+    
+    # 온도 (부호 있는 16비트, 소수점 1자리)
+    raw_temp = regs[1] if regs[1] < 32768 else regs[1] - 65536
+    temperature = raw_temp / 10.0
+    
+    # EC (소수점 0자리)
+    ec = regs[2]
+    return humidity, temperature, ec
+
+@with_banner("🧪 THC-S 토양 센서 테스트", hints=_WIRING_HINTS)
 def test_thc_sensor(port='/dev/ttyS0', address=1, duration=10):
     """
     THC-S 센서 테스트
@@ -17,21 +111,16 @@ def test_thc_sensor(port='/dev/ttyS0', address=1, duration=10):
         address: 센서 주소 (1-12)
         duration: 측정 시간 (초)
     """
-    print("=" * 50)
-    print("🧪 THC-S 토양 센서 테스트")
-    print("=" * 50)
-    print()
-    
     try:
         # Modbus 설정
-        print(f"1️⃣ RS485 Modbus 초기화 중...")
-        print(f"   포트: {port}")
-        print(f"   센서 주소: {address}")
-        print(f"   보드레이트: 4800")
+        print(
+            f"1️⃣ RS485 Modbus 초기화 중...\n"
+            f"   포트: {port}\n"
+            f"   센서 주소: {address}\n"
+            f"   보드레이트: 4800"
+        )
         
-        sensor = minimalmodbus.Instrument(port, address)
-        sensor.serial.baudrate = 4800
-        sensor.serial.timeout = 1
+        sensor = _open_sensor(port, address)
         
         print("   ✓ RS485 Modbus 초기화 완료")
         print()
@@ -47,51 +136,59 @@ def test_thc_sensor(port='/dev/ttyS0', address=1, duration=10):
         print()
         
         # 센서 데이터 읽기
-        print(f"3️⃣ 센서 데이터 측정 ({duration}초)")
-        print()
-        print("   측정 항목:")
-        print("   - 토양 습도 (0-100%)")
-        print("   - 토양 온도 (-40~80°C)")
-        print("   - 토양 EC (0-20000 μS/cm)")
-        print()
-        print("   📊 측정 시작...")
-        print("   " + "-" * 45)
+        print(
+            f"3️⃣ 센서 데이터 측정 ({duration}초)\n"
+            "\n"
+            "   측정 항목:\n"
+            "   - 토양 습도 (0-100%)\n"
+            "   - 토양 온도 (-40~80°C)\n"
+            "   - 토양 EC (0-20000 μS/cm)\n"
+            "\n"
+            "   📊 측정 시작...\n"
+            f"   {'-' * 45}"
+        )
         
-        success_count = 0
-        fail_count = 0
+        samples = []  # (습도, 온도, EC) - 성공한 측정만
         
-        for i in range(duration):
+        for i in fixed_cadence(duration):
             try:
-                # 습도 읽기 (레지스터 0x0000, 소수점 1자리)
-                humidity = sensor.read_register(0x0000, 1)
-                
-                # 온도 읽기 (레지스터 0x0001, 소수점 1자리)
-                temperature = sensor.read_register(0x0001, 1)
-                
-                # EC 읽기 (레지스터 0x0002, 소수점 0자리)
-                ec = sensor.read_register(0x0002, 0)
+                humidity, temperature, ec = _read_thc(sensor)
                 
                 # 결과 출력
-                print(f"   [{i+1:2d}/{duration:2d}] ✅ 습도: {humidity:5.1f}% | "
-                      f"온도: {temperature:5.1f}°C | EC: {ec:5d} μS/cm")
+                progress(f"   [{i+1:2d}/{duration:2d}] ✅ 습도: {humidity:5.1f}% | "
+                         f"온도: {temperature:5.1f}°C | EC: {ec:5d} μS/cm")
                 
-                success_count += 1
-                time.sleep(1)
+                samples.append((humidity, temperature, ec))
                 
             except Exception as e:
-                print(f"   [{i+1:2d}/{duration:2d}] ❌ 읽기 실패: {e}")
-                fail_count += 1
-                time.sleep(1)
+                # 실패 줄은 덮어쓰지 않고 남김
+                progress(f"   [{i+1:2d}/{duration:2d}] ❌ 읽기 실패: {e}")
+                progress_done()
         
-        print("   " + "-" * 45)
-        print()
-        print("=" * 50)
-        print("✅ THC-S 센서 테스트 완료!")
-        print("=" * 50)
-        print()
-        print(f"📊 통계:")
-        print(f"   성공: {success_count}/{duration} ({success_count/duration*100:.1f}%)")
-        print(f"   실패: {fail_count}/{duration} ({fail_count/duration*100:.1f}%)")
+        progress_done()
+        print(
+            f"   {'-' * 45}\n"
+            "\n"
+            f"{'=' * 50}\n"
+            "✅ THC-S 센서 테스트 완료!\n"
+            f"{'=' * 50}\n"
+        )
+        success_count = len(samples)
+        fail_count = duration - success_count
+        print(
+            f"📊 통계:\n"
+            f"   성공: {success_count}/{duration} ({success_count/duration*100:.1f}%)\n"
+            f"   실패: {fail_count}/{duration} ({fail_count/duration*100:.1f}%)"
+        )
+        
+        # 항목별 평균/표준편차/최소/최대 (측정 후 한 번에 계산)
+        if samples:
+            print()
+            print(f"   {'항목':<8}{'평균':>10}{'표준편차':>10}{'최소':>10}{'최대':>10}")
+            for label, values in zip(("습도(%)", "온도(°C)", "EC"), zip(*samples)):
+                stdev = statistics.pstdev(values)
+                print(f"   {label:<8}{statistics.fmean(values):>10.1f}{stdev:>10.2f}"
+                      f"{min(values):>10.1f}{max(values):>10.1f}")
         
         if success_count / duration >= 0.9:
             print()
@@ -103,40 +200,76 @@ def test_thc_sensor(port='/dev/ttyS0', address=1, duration=10):
             return False
         
     except FileNotFoundError:
-        print()
-        print(f"❌ {port} 포트를 찾을 수 없습니다!")
-        print()
-        print("🔍 문제 해결 방법:")
-        print("   1. UART 활성화 확인:")
-        print("      sudo raspi-config → Interface → Serial Port")
-        print("      - Login shell: No")
-        print("      - Serial hardware: Yes")
-        print("   2. 재부팅: sudo reboot")
-        print("   3. 포트 확인: ls -l /dev/ttyS0")
+        print(
+            "\n"
+            f"❌ {port} 포트를 찾을 수 없습니다!\n"
+            "\n"
+            "🔍 문제 해결 방법:\n"
+            "   1. UART 활성화 확인:\n"
+            "      sudo raspi-config → Interface → Serial Port\n"
+            "      - Login shell: No\n"
+            "      - Serial hardware: Yes\n"
+            "   2. 재부팅: sudo reboot\n"
+            "   3. 포트 확인: ls -l /dev/ttyS0"
+        )
         return False
-        
+
+async def _poll_sensor(sensor, address, duration, bus_lock):
+    """센서 1개 폴링 - 버스 사용 구간만 잠그고 1초 대기는 다른 센서와 겹침"""
+    samples = []
+    next_t = time.monotonic()
+    for i in range(duration):
+        try:
+            # RS485 는 반이중이므로 실제 요청/응답은 한 번에 하나씩
+            async with bus_lock:
+                humidity, temperature, ec = await asyncio.to_thread(_read_thc, sensor)
+            print(f"   #{address:<2d} [{i+1:2d}/{duration:2d}] ✅ 습도: {humidity:5.1f}% | "
+                  f"온도: {temperature:5.1f}°C | EC: {ec:5d} μS/cm")
+            samples.append((humidity, temperature, ec))
+        except Exception as e:
+            print(f"   #{address:<2d} [{i+1:2d}/{duration:2d}] ❌ 읽기 실패: {e}")
+        # 고정 주기 (다음 시각 누적 - 버스 대기/읽기 시간만큼 밀리지 않음)
+        next_t += 1.0
+        await asyncio.sleep(max(0, next_t - time.monotonic()))
+    return samples
+
+async def _poll_sensors(port, addresses, duration):
+    bus_lock = asyncio.Lock()
+    sensors = [_open_sensor(port, address) for address in addresses]
+    return await asyncio.gather(*(
+        _poll_sensor(sensor, address, duration, bus_lock)
+        for sensor, address in zip(sensors, addresses)
+    ))
+
+def test_thc_sensors_parallel(port='/dev/ttyS0', addresses=(1, 2, 3), duration=10):
+    """
+    여러 THC-S 센서 동시 테스트 (전체 소요 시간 ≈ duration, 센서 수와 무관)
+    
+    Args:
+        port: 시리얼 포트 (기본 /dev/ttyS0)
+        addresses: 센서 주소 목록
+        duration: 측정 시간 (초)
+    """
+    print(
+        f"{'=' * 50}\n"
+        f"🧪 THC-S 토양 센서 동시 테스트 ({len(addresses)}개)\n"
+        f"{'=' * 50}\n"
+    )
+    
+    try:
+        results = asyncio.run(_poll_sensors(port, addresses, duration))
     except Exception as e:
-        print()
         print(f"❌ 테스트 실패: {e}")
-        print()
-        print("🔍 문제 해결 방법:")
-        print("   1. MAX485 배선 확인:")
-        print("      - VCC → 5V (Pin 2)")
-        print("      - GND → GND (Pin 6)")
-        print("      - DI → TX (GPIO 14, Pin 8)")
-        print("      - RO → RX (GPIO 15, Pin 10)")
-        print("      - DE, RE → GPIO 4 (Pin 7) - 묶어서 연결")
-        print()
-        print("   2. THC-S 센서 배선 확인:")
-        print("      - 갈색(Brown) → 12V+")
-        print("      - 검정(Black) → GND")
-        print("      - 노랑(Yellow) → MAX485 A+")
-        print("      - 파랑(Blue) → MAX485 B-")
-        print()
-        print("   3. 센서 주소 확인:")
-        print(f"      현재 주소: {address}")
-        print("      센서 공장 초기값은 주소 1입니다.")
         return False
+    
+    print()
+    print(f"📊 통계:")
+    all_ok = True
+    for address, samples in zip(addresses, results):
+        rate = len(samples) / duration
+        all_ok = all_ok and rate >= 0.9
+        print(f"   센서 #{address}: 성공 {len(samples)}/{duration} ({rate*100:.1f}%)")
+    return all_ok
 
 if __name__ == '__main__':
     # 기본 테스트 (주소 1, 10초)
@@ -145,3 +278,6 @@ if __name__ == '__main__':
     # 다른 주소 테스트 (주석 해제하여 사용)
     # test_thc_sensor(address=2, duration=10)
     # test_thc_sensor(address=3, duration=10)
+    
+    # 여러 센서 동시 테스트 (주석 해제하여 사용)
+    # test_thc_sensors_parallel(addresses=(1, 2, 3), duration=10)
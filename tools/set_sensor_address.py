@@ -5,6 +5,7 @@ CWT-Soil-THC-S 센서 Modbus 슬레이브 주소 설정 도구
 사용법:
   python3 set_sensor_address.py            # 대화형 모드
   python3 set_sensor_address.py --scan     # 버스 전체 주소 스캔
+  python3 set_sensor_address.py --zones    # 구역 계획 주소(1~12)만 스캔
   python3 set_sensor_address.py --set 1 3  # 주소 1 → 3 으로 변경
 
 배선:
@@ -16,16 +17,24 @@ CWT-Soil-THC-S 센서 Modbus 슬레이브 주소 설정 도구
 주의: 반드시 센서 1개씩만 연결하고 주소 변경!
 """
 
+import os
+import select
 import sys
 import time
 import argparse
 import struct
+from array import array
+from functools import lru_cache
 
 # ── 설정 ────────────────────────────────────────────────
 PORT      = '/dev/ttyAMA0'
 BAUDRATE  = 4800          # 매뉴얼 기본값
 DE_RE_PIN = 18            # GPIO 핀 (BCM)
 TIMEOUT   = 1.5           # 응답 대기 (초)
+SCAN_SLACK = 0.2          # 스캔 시 응답 대기 여유 (초) — 무응답 주소는 이 창만 기다림.
+                          # THC-S 는 요청 후 응답 시작까지 100ms 넘게 걸리기도 함
+T35_SLACK  = 0.025        # 프레임 끝(T3.5 무신호) 판정 여유 — UART FIFO / USB 어댑터
+                          # 전달 지연 흡수 (FTDI latency timer 16 ms 보다 커야 함)
 # ────────────────────────────────────────────────────────
 
 try:
@@ -34,6 +43,14 @@ except ImportError:
     print("❌ pyserial 미설치: pip install pyserial")
     sys.exit(1)
 
+try:
+    import fcntl
+    import termios
+    _TIOCSERGETLSR = termios.TIOCSERGETLSR
+    _TIOCSER_TEMT = termios.TIOCSER_TEMT
+except (ImportError, AttributeError):
+    _TIOCSERGETLSR = None   # 비 Linux — 송신 완료를 계산된 시간으로 대기
+
 try:
     import RPi.GPIO as GPIO
     GPIO_AVAILABLE = True
@@ -41,33 +58,78 @@ except ImportError:
     GPIO_AVAILABLE = False
     print("⚠️  RPi.GPIO 없음 — DE/RE 핀 제어 비활성화 (USB-RS485 어댑터는 자동 제어)")
 
+_gpio_ready = False
+
+
+def _ensure_gpio_init():
+    """GPIO 모드 설정은 프로세스당 1회"""
+    global _gpio_ready
+    if not _gpio_ready:
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setwarnings(False)
+        _gpio_ready = True
+
 
 # ── CRC16 ────────────────────────────────────────────────
-def crc16(data: bytes) -> bytes:
-    crc = 0xFFFF
-    for b in data:
-        crc ^= b
+def _make_crc16_table() -> array:
+    """바이트 값(0~255)별 CRC16 (poly 0xA001) 테이블"""
+    table = array('H')
+    for byte in range(256):
+        crc = byte
         for _ in range(8):
             crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC16_TABLE = _make_crc16_table()
+
+
+def _crc16_int(data) -> int:
+    """Modbus RTU CRC16 값 (테이블 방식 — 바이트당 조회 1회 + XOR 1회)"""
+    crc = 0xFFFF
+    table = _CRC16_TABLE
+    for b in data:
+        crc = (crc >> 8) ^ table[(crc ^ b) & 0xFF]
+    return crc
+
+
+def crc16(data: bytes) -> bytes:
+    """Modbus RTU CRC16 (프레임에 붙일 little-endian 2바이트)"""
+    crc = _crc16_int(data)
     return bytes([crc & 0xFF, crc >> 8])
 
 
+@lru_cache(maxsize=1024)
 def build_pdu(addr: int, func: int, *words: int) -> bytes:
-    """Modbus RTU 프레임 생성"""
-    body = bytes([addr, func]) + b''.join(w.to_bytes(2, 'big') for w in words)
-    return body + crc16(body)
+    """Modbus RTU 프레임 생성
+
+    같은 (주소, 기능코드, 워드) 프레임은 캐시 — scan_bus 의 주소별 핑 프레임은
+    처음 한 번만 CRC 계산 (반환값 bytes 는 불변이라 공유 안전)
+    """
+    n = 2 + 2 * len(words)
+    buf = bytearray(n + 2)
+    struct.pack_into(f'>BB{len(words)}H', buf, 0, addr, func, *words)
+    crc = _crc16_int(memoryview(buf)[:n])
+    buf[n] = crc & 0xFF
+    buf[n + 1] = crc >> 8
+    return bytes(buf)
 
 
 def verify_crc(frame: bytes) -> bool:
     if len(frame) < 4:
         return False
-    return crc16(frame[:-2]) == frame[-2:]
+    # memoryview 로 본문 복사 없이 계산, 정수끼리 비교
+    return _crc16_int(memoryview(frame)[:-2]) == frame[-2] | (frame[-1] << 8)
 
 
 # ── RS485 송수신 ─────────────────────────────────────────
 class RS485:
-    def __init__(self, port, baudrate, de_re_pin=None, timeout=1.5):
+    def __init__(self, port, baudrate, de_re_pin=None, timeout=1.5,
+                 kernel_rs485=False, t35_slack=T35_SLACK, scan_slack=SCAN_SLACK):
         self.de_re_pin = de_re_pin
+        self.scan_slack = scan_slack
+        self.kernel_rs485 = False
         self.ser = serial.Serial(
             port, baudrate,
             bytesize=serial.EIGHTBITS,
@@ -75,52 +137,107 @@ class RS485:
             stopbits=serial.STOPBITS_ONE,
             timeout=timeout
         )
-        if de_re_pin and GPIO_AVAILABLE:
-            GPIO.setmode(GPIO.BCM)
-            GPIO.setwarnings(False)
+        if kernel_rs485:
+            # 커널 RS485 모드 (TIOCSRS485) — UART 드라이버가 송신 구간에만 RTS 를 올림
+            # DE/RE 가 UART RTS 에 연결되어 있어야 함 (예: uart-rts overlay)
+            try:
+                import serial.rs485
+                self.ser.rs485_mode = serial.rs485.RS485Settings(
+                    rts_level_for_tx=True, rts_level_for_rx=False)
+                self.kernel_rs485 = True
+                self.de_re_pin = None   # GPIO 토글 불필요
+            except (ImportError, ValueError, OSError, serial.SerialException) as e:
+                print(f"⚠️  커널 RS485 모드 설정 실패 — GPIO DE/RE 제어 사용: {e}")
+        if self.de_re_pin and GPIO_AVAILABLE:
+            _ensure_gpio_init()
             GPIO.setup(de_re_pin, GPIO.OUT)
             GPIO.output(de_re_pin, GPIO.LOW)   # 초기: 수신 모드
-        time.sleep(0.3)
+        self._lsr_supported = _TIOCSERGETLSR is not None
+        # Modbus T3.5 — 3.5 문자 시간(1문자 = 10비트) 무신호면 프레임 종료
+        self.t35 = 3.5 * 10 / baudrate + t35_slack
+        if self.de_re_pin is None and not self.kernel_rs485:
+            time.sleep(0.3)     # USB-RS485 어댑터 — 포트 오픈 직후 안정화 대기
+
+    def _wait_tx_empty(self, nbytes: int):
+        """UART 송신 shift register 가 빌 때까지 대기
+
+        커널의 TIOCSERGETLSR(TEMT) 로 마지막 비트가 나간 즉시 반환.
+        ioctl 미지원 포트면 바이트수 × 10비트 ÷ 보드레이트 + 여유만큼 sleep
+        """
+        char_time = 10 / self.ser.baudrate
+        tx_time   = nbytes * char_time
+        if self._lsr_supported:
+            lsr = array('i', [0])
+            deadline = time.monotonic() + tx_time + 0.05
+            try:
+                while time.monotonic() < deadline:
+                    fcntl.ioctl(self.ser.fileno(), _TIOCSERGETLSR, lsr, True)
+                    if lsr[0] & _TIOCSER_TEMT:
+                        return
+                    time.sleep(char_time)   # 한 문자 시간씩 쉬며 폴링 (CPU 점유 방지)
+                return
+            except OSError:
+                self._lsr_supported = False
+        time.sleep(tx_time + 0.02)
 
     def send_recv(self, frame: bytes, expect_len: int = 8) -> bytes:
         """송신 후 수신"""
         self.ser.reset_input_buffer()
 
+        if self.kernel_rs485:
+            # DE/RE 전환은 커널이 비트 단위 정확도로 처리 — Python 측 sleep 없음
+            self.ser.write(frame)
+            return self._read_frame(expect_len)
+
         # DE/RE → HIGH (송신)
         if self.de_re_pin and GPIO_AVAILABLE:
             GPIO.output(self.de_re_pin, GPIO.HIGH)
         time.sleep(0.01)
 
         self.ser.write(frame)
-        self.ser.flush()
+        self.ser.flush()    # tcdrain — 커널 버퍼가 UART 로 넘어갈 때까지
 
-        # 송신 완료 대기 (바이트수 × 비트/바이트 ÷ 보드레이트)
-        tx_time = len(frame) * 10 / BAUDRATE
-        time.sleep(tx_time + 0.02)
+        # 송신 완료 대기 (마지막 비트가 선로를 떠날 때까지)
+        self._wait_tx_empty(len(frame))
 
         # DE/RE → LOW (수신)
         if self.de_re_pin and GPIO_AVAILABLE:
             GPIO.output(self.de_re_pin, GPIO.LOW)
 
-        # 응답 수신
-        deadline = time.time() + self.ser.timeout
-        buf = b''
-        while time.time() < deadline:
-            chunk = self.ser.read(expect_len - len(buf))
-            buf += chunk
-            if len(buf) >= expect_len:
+        return self._read_frame(expect_len)
+
+    def _read_frame(self, expect_len: int) -> bytes:
+        """응답 프레임 수신
+
+        첫 바이트는 ser.timeout 까지 대기, 이후 T3.5 동안 추가 바이트가 없으면
+        프레임 종료로 보고 즉시 반환. 예외 응답(5바이트)도 expect_len 을
+        기다리지 않고 바로 돌아옴
+        """
+        fd = self.ser.fileno()
+        buf = bytearray()
+        wait = self.ser.timeout
+        while len(buf) < expect_len:
+            if not select.select([fd], [], [], wait)[0]:
+                break                           # 무응답 또는 T3.5 경과 → 프레임 끝
+            chunk = os.read(fd, 256)
+            if not chunk:
                 break
-            if chunk:
-                deadline = time.time() + 0.05  # 데이터 들어오면 조금 더 대기
-        return buf
+            buf += chunk
+            if len(buf) >= 5 and buf[1] & 0x80:
+                break                           # Modbus 예외 응답 (addr, fc|0x80, code, crc)
+            wait = self.t35
+        return bytes(buf[:expect_len])
 
     def close(self):
         self.ser.close()
         if self.de_re_pin and GPIO_AVAILABLE:
-            GPIO.cleanup()
+            GPIO.cleanup(self.de_re_pin)   # 이 핀만 해제 (다른 GPIO 사용자 보호)
 
 
 # ── Modbus 명령 ───────────────────────────────────────────
+_UNPACK_CACHE: dict[int, struct.Struct] = {}   # byte_count → '>nH' Struct
+
+
 def read_register(bus: RS485, addr: int, reg: int, count: int = 1):
     """FC03 — 레지스터 읽기. 성공 시 값 리스트 반환, 실패 시 None"""
     frame = build_pdu(addr, 0x03, reg, count)
@@ -135,9 +252,12 @@ def read_register(bus: RS485, addr: int, reg: int, count: int = 1):
         return None
 
     n = resp[2]
-    values = [int.from_bytes(resp[3 + i*2: 5 + i*2], 'big')
-              for i in range(n // 2)]
-    return values
+    if len(resp) < 3 + n + 2:
+        return None
+    unpacker = _UNPACK_CACHE.get(n)
+    if unpacker is None:
+        unpacker = _UNPACK_CACHE[n] = struct.Struct(f'>{n // 2}H')
+    return list(unpacker.unpack_from(resp, 3))
 
 
 def write_register(bus: RS485, addr: int, reg: int, value: int) -> bool:
@@ -177,18 +297,38 @@ def change_address(bus: RS485, current: int, new_addr: int) -> bool:
     return write_register(bus, current, 0x07D0, new_addr)
 
 
-def scan_bus(bus: RS485, start: int = 1, end: int = 247) -> list[int]:
-    """버스 전체 스캔 — 응답하는 주소 목록 반환"""
-    found = []
-    print(f"\n🔍 주소 {start}~{end} 스캔 중...")
-    for addr in range(start, end + 1):
-        sys.stdout.write(f'\r   검사 중: {addr:3d} / {end}  ')
-        sys.stdout.flush()
-        vals = read_register(bus, addr, 0x0000, 1)
-        if vals is not None:
-            found.append(addr)
-            sys.stdout.write(f'\r   ✅ 주소 {addr:3d} 응답!\n')
-    print(f'\r   스캔 완료. {" " * 30}')
+def scan_bus(bus: RS485, start: int = 1, end: int = 247,
+             candidates: list[int] | None = None) -> dict[int, dict]:
+    """버스 스캔 — {응답 주소: 센서 데이터} 반환
+
+    스캔 요청 자체가 수분/온도/EC 3개 레지스터를 읽으므로 발견 후 다시 핑할 필요 없음.
+    candidates 를 주면 해당 주소만 검사 (예: ZONE_PLAN 의 12개 주소)
+    """
+    addrs = list(candidates) if candidates is not None else range(start, end + 1)
+    last = addrs[-1] if addrs else end
+    # 무응답 주소마다 TIMEOUT(1.5초)을 기다리지 않도록 응답 창만큼만 대기
+    # FC03 3레지스터 응답 11바이트 × 10비트 / 보드레이트 + 여유
+    scan_timeout = 11 * 10 / bus.ser.baudrate + bus.scan_slack
+    saved_timeout = bus.ser.timeout
+    bus.ser.timeout = scan_timeout
+
+    found = {}
+    if candidates is not None:
+        print(f"\n🔍 후보 주소 {len(addrs)}개 스캔 중...")
+    else:
+        print(f"\n🔍 주소 {start}~{end} 스캔 중...")
+    try:
+        for i, addr in enumerate(addrs):
+            # 진행 표시는 10개마다 + 마지막에만 갱신 (\r 줄은 개행이 없어 flush 필요)
+            if i % 10 == 0 or addr == last:
+                sys.stdout.write(f'\r   검사 중: {addr:3d} / {last}  (발견 {len(found)}개)  ')
+                sys.stdout.flush()
+            data = ping_sensor(bus, addr)
+            if data is not None:
+                found[addr] = data
+    finally:
+        bus.ser.timeout = saved_timeout
+    print(f'\r   스캔 완료. 발견 {len(found)}개{" " * 30}')
     return found
 
 
@@ -213,6 +353,7 @@ def interactive_mode(bus: RS485):
     print("    s <주소>       — 주소 스캔 / 센서 응답 확인")
     print("    set <현재> <새> — 주소 변경")
     print("    scan           — 버스 전체 스캔 (1~30)")
+    print("    zones          — 구역 계획 주소(1~12)만 스캔")
     print("    q              — 종료")
     print()
 
@@ -231,17 +372,18 @@ def interactive_mode(bus: RS485):
         if parts[0] in ('q', 'quit', 'exit'):
             break
 
-        # ── 전체 스캔 ──
-        elif parts[0] == 'scan':
-            end = int(parts[1]) if len(parts) > 1 else 30
-            found = scan_bus(bus, 1, end)
+        # ── 전체 스캔 / 구역 주소 스캔 ──
+        elif parts[0] in ('scan', 'zones'):
+            if parts[0] == 'zones':
+                found = scan_bus(bus, candidates=sorted(ZONE_PLAN.values()))
+            else:
+                end = int(parts[1]) if len(parts) > 1 else 30
+                found = scan_bus(bus, 1, end)
             if found:
-                print(f"\n  발견된 주소: {found}")
-                for a in found:
-                    data = ping_sensor(bus, a)
-                    if data:
-                        print(f"    주소 {a:3d}: 수분={data['moisture']}%  "
-                              f"온도={data['temperature']}°C  EC={data['ec']}μS/cm")
+                print(f"\n  발견된 주소: {list(found)}")
+                for a, data in found.items():
+                    print(f"    주소 {a:3d}: 수분={data['moisture']}%  "
+                          f"온도={data['temperature']}°C  EC={data['ec']}μS/cm")
             else:
                 print("  ⚠️  응답하는 센서 없음")
 
@@ -292,7 +434,7 @@ def interactive_mode(bus: RS485):
                 print(f"  ❌ 주소 변경 실패 — 응답 없음 또는 CRC 오류")
 
         else:
-            print("  명령 형식: s <주소> | set <현재> <새> | scan | q")
+            print("  명령 형식: s <주소> | set <현재> <새> | scan | zones | q")
 
     print("\n종료합니다.")
 
@@ -312,15 +454,16 @@ def cli_set(bus: RS485, current: int, new_addr: int):
         sys.exit(1)
 
 
-def cli_scan(bus: RS485):
-    found = scan_bus(bus, 1, 30)
+def cli_scan(bus: RS485, zones_only: bool = False):
+    if zones_only:
+        found = scan_bus(bus, candidates=sorted(ZONE_PLAN.values()))
+    else:
+        found = scan_bus(bus, 1, 30)
     if found:
-        print(f"\n발견된 센서 주소: {found}")
-        for a in found:
-            data = ping_sensor(bus, a)
-            if data:
-                print(f"  주소 {a:2d}: 수분={data['moisture']}%  "
-                      f"온도={data['temperature']}°C  EC={data['ec']}μS/cm")
+        print(f"\n발견된 센서 주소: {list(found)}")
+        for a, data in found.items():
+            print(f"  주소 {a:2d}: 수분={data['moisture']}%  "
+                  f"온도={data['temperature']}°C  EC={data['ec']}μS/cm")
     else:
         print("응답하는 센서 없음")
 
@@ -333,7 +476,14 @@ def main():
     parser.add_argument('--port',    default=PORT,      help=f'시리얼 포트 (기본: {PORT})')
     parser.add_argument('--baud',    default=BAUDRATE,  type=int, help=f'보드레이트 (기본: {BAUDRATE})')
     parser.add_argument('--de-re',   default=DE_RE_PIN, type=int, help=f'DE/RE GPIO 핀 (기본: {DE_RE_PIN})')
+    parser.add_argument('--kernel-rs485', action='store_true',
+                        help='커널 RS485 모드로 DE/RE 자동 제어 (DE/RE 가 UART RTS 에 연결된 경우)')
+    parser.add_argument('--t35-slack', default=T35_SLACK, type=float,
+                        help=f'프레임 끝 판정 여유 초 (기본: {T35_SLACK}) — USB 어댑터에서 응답이 잘리면 늘림')
+    parser.add_argument('--scan-slack', default=SCAN_SLACK, type=float,
+                        help=f'스캔 시 주소당 응답 대기 여유 초 (기본: {SCAN_SLACK}) — 있는 센서가 안 잡히면 늘림')
     parser.add_argument('--scan',    action='store_true',          help='버스 전체 스캔 (1~30)')
+    parser.add_argument('--zones',   action='store_true',          help='구역 계획 주소(1~12)만 스캔')
     parser.add_argument('--set',     nargs=2, type=int, metavar=('현재주소', '새주소'),
                         help='주소 변경 (예: --set 1 3)')
     args = parser.parse_args()
@@ -341,14 +491,16 @@ def main():
     print(f"\n포트: {args.port}  보드레이트: {args.baud}  DE/RE: GPIO{args.de_re}")
 
     try:
-        bus = RS485(args.port, args.baud, de_re_pin=args.de_re, timeout=TIMEOUT)
+        bus = RS485(args.port, args.baud, de_re_pin=args.de_re, timeout=TIMEOUT,
+                    kernel_rs485=args.kernel_rs485, t35_slack=args.t35_slack,
+                    scan_slack=args.scan_slack)
     except serial.SerialException as e:
         print(f"❌ 포트 열기 실패: {e}")
         sys.exit(1)
 
     try:
-        if args.scan:
-            cli_scan(bus)
+        if args.scan or args.zones:
+            cli_scan(bus, zones_only=args.zones)
         elif args.set:
             cli_set(bus, args.set[0], args.set[1])
         else:
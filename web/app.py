@@ -2,15 +2,40 @@
 Flask 웹 대시보드 메인 애플리케이션 (Blueprint 리팩터링)
 버전: v0.6.2 (Stage13/config-unify) — version.json으로 동적 관리
 """
-import os, sys, signal, threading, time, json, atexit
+import os
+
+# SocketIO async_mode — 기본은 threading. SMARTFARM_ASYNC_MODE=eventlet|gevent 이면
+# 다른 모듈(threading/socket/serial 등)을 import 하기 전에 monkey_patch 해야 함 (os 만 예외)
+_ASYNC_MODE = os.environ.get('SMARTFARM_ASYNC_MODE') or None
+_offload = lambda fn, *args: fn(*args)   # 블로킹 하드웨어 I/O 실행기 (threading 모드는 그대로 호출)
+if _ASYNC_MODE == 'eventlet':
+    try:
+        import eventlet
+        eventlet.monkey_patch()
+        # I²C/ADC 읽기는 monkey_patch 로도 양보하지 않으므로 네이티브 스레드 풀에서 실행
+        from eventlet import tpool
+        _offload = tpool.execute
+    except ImportError:
+        print("⚠️  eventlet 미설치 → threading 모드로 실행 (pip install eventlet)")
+        _ASYNC_MODE = None
+elif _ASYNC_MODE == 'gevent':
+    try:
+        from gevent import monkey
+        monkey.patch_all()
+        import gevent
+        _offload = lambda fn, *args: gevent.get_hub().threadpool.apply(fn, args)
+    except ImportError:
+        print("⚠️  gevent 미설치 → threading 모드로 실행 (pip install gevent gevent-websocket)")
+        _ASYNC_MODE = None
+
+import sys, signal, threading, time, json, atexit
 from pathlib import Path
-from datetime import datetime
 
 _BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.append(str(_BASE_DIR))
 
 from flask import Flask, render_template
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'smart-farm-secret-2026'
@@ -22,7 +47,45 @@ _CACHE_VER = str(int(_time.time()))
 def inject_cache_ver():
     return dict(cache_ver=_CACHE_VER)
 
-socketio = SocketIO(app, cors_allowed_origins="*")
+try:
+    import orjson        # 선택: jsonify / SocketIO 인코딩 가속 (없으면 표준 json)
+except ImportError:
+    orjson = None
+
+# jsonify 응답 인코더 — orjson 이 있으면 사용. 표준 provider 와 같은 출력을 내도록
+# 키 정렬, int 키 → 문자열, datetime 은 Flask 기본 형식(default)으로 넘김
+if orjson:
+    from flask.json.provider import DefaultJSONProvider
+
+    class _OrjsonProvider(DefaultJSONProvider):
+        _OPTS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, default=self.default, option=self._OPTS).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+        def response(self, *args, **kwargs):
+            # jsonify 경로는 bytes 를 그대로 본문으로 (str 디코드 → 다시 인코드 생략)
+            obj  = self._prepare_response_obj(args, kwargs)
+            body = orjson.dumps(obj, default=self.default,
+                                option=self._OPTS | orjson.OPT_APPEND_NEWLINE)
+            return self._app.response_class(body, mimetype=self.mimetype)
+    app.json = _OrjsonProvider(app)
+
+# SocketIO 패킷 인코더 — orjson 이 있으면 사용 (없으면 Flask 기본 json)
+_SOCKETIO_OPTS = {}
+if orjson:
+    class _OrjsonCodec:
+        """python-socketio 가 넘기는 separators 등 json 모듈용 kwargs 는 무시"""
+        @staticmethod
+        def dumps(obj, *args, **kwargs): return orjson.dumps(obj).decode()
+        @staticmethod
+        def loads(s, *args, **kwargs): return orjson.loads(s)
+    _SOCKETIO_OPTS = {'json': _OrjsonCodec}
+
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=_ASYNC_MODE, **_SOCKETIO_OPTS)
 
 import web.globals as g
 g._BASE_DIR = _BASE_DIR
@@ -32,9 +95,8 @@ def _load_version() -> str:
     """config/version.json 에서 버전 문자열을 읽어 반환. 실패 시 fallback."""
     try:
         _vf = _BASE_DIR / 'config' / 'version.json'
-        import json as _json
         with open(str(_vf), encoding='utf-8') as _f:
-            return _json.load(_f).get('version', '0.0.0')
+            return json.load(_f).get('version', '0.0.0')
     except Exception:
         return '0.6.2'
 
@@ -75,78 +137,139 @@ def irrigation(): return render_template('irrigation.html')
 @app.route('/settings')
 def settings(): return render_template('settings.html')
 
+_clients      = 0   # 연결된 SocketIO 클라이언트 수 (0 이면 주기 전송 생략)
+_clients_lock = threading.Lock()
+_client_joined = False   # 새 연결 → sender 가 늘어난 주기를 기본 주기로 되돌림 (즉시 측정은 안 함)
+
 @socketio.on('connect')
-def handle_connect(): emit('connected', {'message': '서버에 연결되었습니다'})
+def handle_connect():
+    global _clients, _client_joined
+    with _clients_lock: _clients += 1
+    _client_joined = True
+    g.monitoring_wake.set()   # sender 는 대기 시간만 다시 계산 (마지막 측정 후 기본 주기에 측정)
+    emit('connected', {'message': '서버에 연결되었습니다'})
+    # 마지막 측정값을 바로 전송 (재연결 폭주가 ADC 읽기 폭주로 번지지 않도록)
+    emit('sensor_update', g.sensor_payload or g._refresh_sensor_payload())
 
 @socketio.on('disconnect')
-def handle_disconnect(): pass
+def handle_disconnect():
+    global _clients
+    with _clients_lock: _clients = max(0, _clients - 1)
+
+# 페이지별 구독 — 'tick' 은 대시보드 룸에만 전송
+_ROOMS = {'dashboard'}
+
+@socketio.on('subscribe')
+def handle_subscribe(rooms):
+    for room in rooms or []:
+        if room in _ROOMS: join_room(room)
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe(rooms):
+    for room in rooms or []:
+        if room in _ROOMS: leave_room(room)
 
 @socketio.on('request_status')
 def handle_request_status():
-    ts_obj = g.cached_sensor_data.get('timestamp', '')
-    ts_str = ts_obj if isinstance(ts_obj, str) else ts_obj.strftime('%Y-%m-%d %H:%M:%S')
-    emit('sensor_update', {
-        'timestamp':   ts_str,
-        'tank1_level': round(g.cached_sensor_data.get('tank1_level', 0), 1),
-        'tank2_level': round(g.cached_sensor_data.get('tank2_level', 0), 1),
-        'voltages':    [round(v, 3) for v in g.cached_sensor_data.get('voltages', [0,0,0,0])]
-    })
+    emit('sensor_update', g.sensor_payload or g._refresh_sensor_payload())
+
+# AlertManager 콜백 — sender 의 check_all 중 발생한 경고는 모아 두었다가 같은 'tick' 에 함께 전송.
+# 그 밖(통신 오류/정보 알림 등)의 경고는 기다리지 않고 바로 'new_alert' 로 전송
+_tick_alerts = threading.local()   # .batch: check_all 실행 중인 sender 에서만 list
+
+def _on_alert(alert):
+    batch = getattr(_tick_alerts, 'batch', None)
+    if batch is not None:
+        batch.append(alert.to_dict())
+    elif _clients:
+        socketio.emit('new_alert', alert.to_dict(), to='dashboard')
+
+# 측정 주기 — 수위 변화가 없으면 기본 주기에서 점점 늘림 (보는 클라이언트가 있으면 최대 40초)
+_POLL_BASE    = 10    # 초
+_POLL_MAX     = 60    # 초 — 클라이언트가 없을 때만
+_POLL_EPSILON = 0.5   # % — 이보다 작은 변화는 '안정'으로 봄
+_STABLE_MAX   = 6     # stable_cycles 상한 → 10 * (1 + 6 // 2) = 40초
+
+def _next_interval(stable_cycles):
+    interval = _POLL_BASE * (1 + stable_cycles // 2)
+    if not _clients and stable_cycles:
+        interval = _POLL_MAX   # 보는 클라이언트도 없고 수위도 그대로면 최대 주기
+    return interval
 
 def periodic_data_sender():
+    global _client_joined
     print("🔄 periodic_data_sender 스레드 시작")
     consecutive_errors = 0
+    last_error    = None
+    last_levels   = None
+    stable_cycles = 0
     while g.monitoring_active:
+        sampled_at = time.monotonic()
         try:
             if g.sensor_monitor:
-                status = g.sensor_monitor._collect_sensor_data()
-                g.cached_sensor_data.update({
-                    'timestamp': status['timestamp'], 'voltages': status['voltages'],
-                    'tank1_level': status['tank1_level'], 'tank2_level': status['tank2_level'],
-                    'sensor_type': g.sensor_monitor.sensor_reader.calibration.get('sensor_type', 'voltage')
-                })
+                status = _offload(g.sensor_monitor._collect_sensor_data)
+                payload = g._publish_sample(status)
                 g.sensor_monitor._add_to_history(status)
-                ts_obj = status['timestamp']
-                ts_str = ts_obj if isinstance(ts_obj, str) else ts_obj.strftime('%Y-%m-%d %H:%M:%S')
-                ts_dt  = datetime.strptime(ts_str, '%Y-%m-%d %H:%M:%S') if isinstance(ts_obj, str) else ts_obj
+                levels = (status['tank1_level'], status['tank2_level'])
+                if last_levels and max(abs(a - b) for a, b in zip(levels, last_levels)) < _POLL_EPSILON:
+                    stable_cycles = min(stable_cycles + 1, _STABLE_MAX)
+                else:
+                    stable_cycles = 0
+                last_levels = levels
                 if g.data_logger:
                     g.data_logger.log_sensor_data(
                         tank1_level=status['tank1_level'], tank2_level=status['tank2_level'],
-                        voltages=status['voltages'], timestamp=ts_dt)
-                if g.alert_manager:
-                    g.alert_manager.check_water_level(1, status['tank1_level'])
-                    g.alert_manager.check_water_level(2, status['tank2_level'])
-                    for i, v in enumerate(status['voltages']): g.alert_manager.check_sensor_error(v, i)
-                socketio.emit('sensor_update', {
-                    'timestamp': ts_str,
-                    'tank1_level': round(status['tank1_level'], 1),
-                    'tank2_level': round(status['tank2_level'], 1),
-                    'voltages': [round(v, 3) for v in status['voltages']]
-                })
+                        voltages=status['voltages'], timestamp=status['timestamp_dt'])
+                # 이번 측정에서 발생한 경고를 샘플과 함께 한 프레임으로 전송
+                alerts = _tick_alerts.batch = []
+                try:
+                    if g.alert_manager:
+                        g.alert_manager.check_all([status['tank1_level'], status['tank2_level']],
+                                                  status['voltages'])
+                finally:
+                    _tick_alerts.batch = None
+                if _clients:
+                    socketio.emit('tick', {'sensor': payload, 'alerts': alerts}, to='dashboard')
             consecutive_errors = 0
         except Exception as e:
             consecutive_errors += 1
-            print(f"❌ 주기적 데이터 전송 오류 ({consecutive_errors}회 연속): {e}")
+            # 같은 오류가 매 주기 반복되면 처음, 내용이 바뀔 때, 10회마다만 출력
+            msg = str(e)
+            if consecutive_errors == 1 or msg != last_error or consecutive_errors % 10 == 0:
+                print(f"❌ 주기적 데이터 전송 오류 ({consecutive_errors}회 연속): {msg}")
+            last_error = msg
             if consecutive_errors == 10:
                 try:
                     if g.telegram_notifier:
                         g.telegram_notifier.send(f'🚨 [시스템 경고]\nperiodic_data_sender 10회 연속 오류\n마지막 오류: {e}')
                 except Exception: pass
-        try: time.sleep(10)
-        except Exception: pass
+        deadline = sampled_at + _next_interval(stable_cycles)
+        while g.monitoring_active:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not g.monitoring_wake.wait(remaining):
+                break
+            g.monitoring_wake.clear()   # stop_monitoring 또는 새 클라이언트 연결
+            if _client_joined:
+                _client_joined = False
+                stable_cycles = 0
+                deadline = min(deadline, sampled_at + _POLL_BASE)
     print("⏹️  periodic_data_sender 스레드 종료")
 
 def _start_periodic_sender():
-    t = threading.Thread(target=periodic_data_sender, daemon=True, name="PeriodicSender")
-    t.start(); g.monitoring_thread = t
+    # async_mode(threading/eventlet)에 맞는 백그라운드 태스크로 시작
+    t = socketio.start_background_task(periodic_data_sender)
+    g.monitoring_thread = t
     print("🔄 periodic_data_sender 스레드 (재)시작됨")
     return t
 
+g.start_periodic_sender = _start_periodic_sender
+
 def _watchdog_loop():
     print("🐕 watchdog 스레드 시작")
     while g.monitoring_active:
-        time.sleep(30)
+        socketio.sleep(30)
         if not g.monitoring_active: break
-        if g.monitoring_thread is None or not g.monitoring_thread.is_alive():
+        if not g._task_alive(g.monitoring_thread):
             if g.monitoring_active:
                 print("⚠️  [watchdog] periodic_data_sender 스레드 죽음 → 재시작")
                 try:
@@ -164,9 +287,9 @@ def init_monitoring_system():
         except Exception as _e:
             print(f"⚠️  DBManager 초기화 실패: {_e}")
             g.db_manager = None
-        g.data_logger = DataLogger(log_dir=str(_BASE_DIR / 'logs'), db_manager=g.db_manager)
+        g.data_logger = DataLogger(log_dir=g.LOG_DIR, db_manager=g.db_manager)
         try:
-            with open(str(_BASE_DIR / 'config/notifications.json')) as f:
+            with open(g.NOTIFICATIONS_PATH) as f:
                 _nc = json.load(f)
             _thr = _nc.get('thresholds', {})
             _t1_min = float(_thr.get('tank1_min', 20.0)); _t1_max = float(_thr.get('tank1_max', 90.0))
@@ -187,11 +310,7 @@ def init_monitoring_system():
         g.alert_manager = AlertManager(tank1_min=_t1_min, tank1_max=_t1_max, tank2_min=_t2_min, tank2_max=_t2_max,
                                         cooldown_seconds=_cooldown, log_file=str(_BASE_DIR/'logs/alerts.log'), db_manager=g.db_manager,
                                         vol_min=_vol_min, vol_max=_vol_max)
-        def alert_callback(alert):
-            socketio.emit('new_alert', {'timestamp':alert.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                'level':alert.level.value,'type':alert.alert_type.value,'message':alert.message,
-                'tank_num':alert.tank_num,'value':alert.value})
-        g.alert_manager.add_callback(alert_callback)
+        g.alert_manager.add_callback(_on_alert)
         g.relay_controller = RelayController()
         try:
             g.soil_sensor_manager = SoilSensorManager()
@@ -201,13 +320,12 @@ def init_monitoring_system():
             g.auto_irrigation.get_tank_level_callback = _get_tank1_level
             try:
                 g.irrigation_scheduler = IrrigationScheduler(g.auto_irrigation)
-                from web.globals import _load_soil_config
-                _b_mode = _load_soil_config().get('irrigation', {}).get('mode', 'auto')
+                _b_mode = g._load_soil_config().get('irrigation', {}).get('mode', 'auto')
                 g.auto_irrigation.set_mode(_b_mode)
                 g.auto_irrigation.attach_scheduler(g.irrigation_scheduler)
                 print(f"[Init] 스케줄러 연결 완료 (running={g.irrigation_scheduler._running})")
                 try:
-                    with open(str(_BASE_DIR/'config/notifications.json')) as f: _nc = json.load(f)
+                    with open(g.NOTIFICATIONS_PATH) as f: _nc = json.load(f)
                     _tc = _nc.get("telegram", {})
                     if _tc.get("enabled", False):
                         g.telegram_notifier = TelegramNotifier(token=_tc["token"], chat_id=_tc["chat_id"])
@@ -215,7 +333,7 @@ def init_monitoring_system():
                         g.telegram_notifier.start_polling(controller=g.auto_irrigation)
                         g.telegram_notifier.notify_server_start()
                         print("✅ 텔레그램 알림 초기화 완료")
-                        import sys as _s; _s.modules[__name__].telegram_notifier = g.telegram_notifier  # auto_controller 호환 alias
+                        sys.modules[__name__].telegram_notifier = g.telegram_notifier  # auto_controller 호환 alias
                 except Exception as e: print(f"⚠️ 텔레그램 초기화 실패: {e}")
             except Exception as e: print(f"⚠️  IrrigationScheduler 초기화 실패: {e}"); g.irrigation_scheduler = None
         except Exception as e:
@@ -239,7 +357,7 @@ def init_monitoring_system():
         print(f"✅ 모니터링 시스템 초기화 완료 (v{_APP_VERSION})")
         g.monitoring_active = True
         _start_periodic_sender()
-        threading.Thread(target=_watchdog_loop, daemon=True, name="SenderWatchdog").start()
+        socketio.start_background_task(_watchdog_loop)
         print("🚀 모니터링 자동 시작됨")
         return True
     except Exception as e:
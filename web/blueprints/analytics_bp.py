@@ -11,9 +11,9 @@ analytics_bp.py (Stage 14b – 날짜 범위 limit 동적화, 시뮬레이션 
 """
 
 import csv
-import glob
+import mmap
 import os
-import statistics
+import sqlite3
 from datetime import datetime as _dt
 from flask import Blueprint, jsonify, render_template, request
 import web.globals as g
@@ -30,19 +30,23 @@ def analytics():
 
 # ── 공통 헬퍼 ─────────────────────────────────────────────────────────────────
 
-def _calc_stats(values: list, rows_ref: list) -> dict:
-    vals = [float(v) for v in values if v not in ('', None)]
-    if not vals:
+def _new_acc() -> list:
+    """[count, sum, min, max] — 행을 읽으면서 바로 누적 (값 리스트를 만들지 않음)"""
+    return [0, 0.0, float('inf'), float('-inf')]
+
+
+def _calc_stats(acc: list, first_ts: str, last_ts: str) -> dict:
+    count, total, lo, hi = acc
+    if not count:
         return {'count': 0, 'avg': 0, 'min': 0, 'max': 0,
                 'first_timestamp': '', 'last_timestamp': ''}
-    ts = [r.get('timestamp', '') for r in rows_ref]
     return {
-        'count':           len(vals),
-        'avg':             round(statistics.mean(vals), 1),
-        'min':             round(min(vals), 1),
-        'max':             round(max(vals), 1),
-        'first_timestamp': ts[0]  if ts else '',
-        'last_timestamp':  ts[-1] if ts else '',
+        'count':           count,
+        'avg':             round(total / count, 1),
+        'min':             round(lo, 1),
+        'max':             round(hi, 1),
+        'first_timestamp': first_ts,
+        'last_timestamp':  last_ts,
     }
 
 
@@ -114,27 +118,40 @@ def analytics_sensor_data():
             return jsonify({'success': False, 'error': str(e)}), 500
 
     # ── CSV 폴백 ─────────────────────────────────────────
-    log_dir = str(g._BASE_DIR / 'logs')
     try:
-        files = sorted(glob.glob(os.path.join(log_dir, 'sensors_*.csv')))
-        if date_from:
-            files = [f for f in files if os.path.basename(f) >= f'sensors_{date_from}.csv']
-        if date_to:
-            files = [f for f in files if os.path.basename(f) <= f'sensors_{date_to}.csv']
-        rows = []
+        files = g._sensor_csv_files(date_from, date_to)
+        # 한 번 읽으면서 통계 누적, dict 변환은 응답에 들어갈 샘플 행만
+        rows = []                                   # (header, row)
+        accs = {'tank1': _new_acc(), 'tank2': _new_acc()}
         for fpath in files:
-            with open(fpath, 'r', encoding='utf-8') as f:
-                for row in csv.DictReader(f):
-                    rows.append(row)
+            with open(fpath, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                if not header: continue
+                cols = [(accs[k], header.index(f'{k}_level'))
+                        for k in accs if f'{k}_level' in header]
+                for row in reader:
+                    rows.append((header, row))
+                    for acc, i in cols:
+                        try:
+                            v = float(row[i])
+                        except (IndexError, ValueError):
+                            continue
+                        acc[0] += 1
+                        acc[1] += v
+                        if v < acc[2]: acc[2] = v
+                        if v > acc[3]: acc[3] = v
         MAX_ROWS = 2000
         step = max(1, len(rows) // MAX_ROWS)
+        first_ts = dict(zip(*rows[0])).get('timestamp', '')  if rows else ''
+        last_ts  = dict(zip(*rows[-1])).get('timestamp', '') if rows else ''
         return jsonify({
             'success': True,
-            'data':    rows[::step],
+            'data':    [dict(zip(h, r)) for h, r in rows[::step]],
             'total':   len(rows),
             'stats': {
-                'tank1': _calc_stats([r.get('tank1_level', '') for r in rows], rows),
-                'tank2': _calc_stats([r.get('tank2_level', '') for r in rows], rows),
+                'tank1': _calc_stats(accs['tank1'], first_ts, last_ts),
+                'tank2': _calc_stats(accs['tank2'], first_ts, last_ts),
             }
         })
     except Exception as e:
@@ -143,6 +160,26 @@ def analytics_sensor_data():
 
 # ── /api/analytics/irrigation-history ────────────────────────────────────────
 
+def _seek_line(mm, lo, hi, key, right=False):
+    """
+    [lo, hi) 범위(줄 시작 위치)에서 앞부분이 key 이상(right=True 면 초과)인
+    첫 줄의 시작 위치를 이분 탐색으로 찾음 (줄들이 key 기준 정렬되어 있어야 함)
+    """
+    n = len(key)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        s = mm.rfind(b'\n', lo, mid)
+        s = lo if s < 0 else s + 1
+        e = mm.find(b'\n', s, hi)
+        e = hi if e < 0 else e + 1
+        head = mm[s:s + n]
+        if head < key or (right and head == key):
+            lo = e
+        else:
+            hi = s
+    return lo
+
+
 @analytics_bp.route('/api/analytics/irrigation-history')
 def analytics_irrigation_history():
     date_from = request.args.get('from')
@@ -159,26 +196,35 @@ def analytics_irrigation_history():
             return jsonify({'success': False, 'error': str(e)}), 500
 
     # ── CSV / 메모리 폴백 ─────────────────────────────────
-    csv_path = str(g._BASE_DIR / 'logs/irrigation_history.csv')
+    csv_path = g.IRRIGATION_CSV_PATH
     if not os.path.exists(csv_path):
         if g.auto_irrigation:
             return jsonify({
                 'success': True,
-                'data':    list(reversed(g.auto_irrigation.irrigation_history)),
+                'data':    g.auto_irrigation.irrigation_history[::-1],
                 'source':  'memory'
             })
         return jsonify({'success': True, 'data': [], 'source': 'empty'})
     try:
-        rows = []
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            for row in csv.DictReader(f):
-                ts = row.get('timestamp', '')
-                if date_from and ts < date_from:
-                    continue
-                if date_to and ts > date_to + ' 23:59:59':
-                    continue
-                rows.append(row)
-        return jsonify({'success': True, 'data': list(reversed(rows)),
+        with open(csv_path, 'rb') as f:
+            header_line = f.readline()
+            header = next(csv.reader([header_line.decode('utf-8-sig')]), [])
+            size   = os.fstat(f.fileno()).st_size
+            lo, hi = len(header_line), size
+            if (date_from or date_to) and header[:1] == ['timestamp'] and hi > lo:
+                # 관수 이력은 시간순으로 append 되고 timestamp 가 첫 열이므로
+                # 파일 바이트 위치를 이분 탐색해 기간 구간만 잘라 파싱
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if date_from:
+                        lo = _seek_line(mm, lo, hi, date_from.encode())
+                    if date_to:
+                        hi = _seek_line(mm, lo, hi, (date_to + ' 23:59:59').encode(), right=True)
+                    body = mm[lo:hi]
+            else:
+                body = f.read()
+        raw = csv.reader(body.decode('utf-8').splitlines())
+        rows = [dict(zip(header, r)) for r in raw if r]
+        return jsonify({'success': True, 'data': rows[::-1],
                         'total': len(rows), 'source': 'csv'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -261,7 +307,6 @@ def analytics_trigger_stats():
     if not getattr(g, 'db_manager', None):
         return jsonify({'success': False, 'error': 'DBManager 미초기화'}), 503
     try:
-        import sqlite3
         conn = sqlite3.connect(g.db_manager.db_path)
         conn.row_factory = sqlite3.Row
         cur = conn.cursor()
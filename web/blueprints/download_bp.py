@@ -1,5 +1,5 @@
 """다운로드 Blueprint (Stage 14b – 환경 데이터 CSV 추가)"""
-import csv, glob, io, os
+import csv, io, os
 from datetime import datetime
 from flask import Blueprint, Response, jsonify, request
 import web.globals as g
@@ -40,24 +40,36 @@ def download_irrigation_history():
             pass  # SQLite 실패 시 CSV 폴백
 
     # ── CSV 파일 폴백 ─────────────────────────────────────
-    csv_path = str(g._BASE_DIR / 'logs/irrigation_history.csv')
+    csv_path = g.IRRIGATION_CSV_PATH
     if not os.path.exists(csv_path):
         return jsonify({'error': '관수 이력 파일 없음'}), 404
+    if not date_from and not date_to:
+        # 필터 없음 → 파일 바이트 그대로 스트리밍 (헤더가 아래 fieldnames 와 동일)
+        fn = f"irrigation_history_{datetime.now().strftime('%Y%m%d')}.csv"
+        return Response(
+            _concat_csv_files([csv_path]),
+            mimetype='text/csv; charset=utf-8',
+            headers={'Content-Disposition': f'attachment; filename={fn}'}
+        )
     try:
-        rows = []
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            for row in csv.DictReader(f):
-                if date_from and row.get('timestamp', '') < date_from: continue
-                if date_to and row.get('timestamp', '') > date_to + ' 23:59:59': continue
-                rows.append(row)
+        fieldnames = ['timestamp', 'zone_id', 'duration_sec',
+                      'trigger', 'moisture_before', 'success']
         output = io.StringIO()
-        writer = csv.DictWriter(
-            output,
-            fieldnames=['timestamp', 'zone_id', 'duration_sec',
-                        'trigger', 'moisture_before', 'success']
-        )
-        writer.writeheader()
-        writer.writerows(rows)
+        writer = csv.writer(output)
+        writer.writerow(fieldnames)
+        with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            # 행마다 dict 를 만들지 않고 컬럼 위치로 바로 접근
+            cols   = [header.index(k) if k in header else None for k in fieldnames]
+            ti     = cols[0]
+            lo     = date_from or ''
+            hi     = date_to + ' 23:59:59' if date_to else None
+            for row in reader:
+                ts = row[ti] if ti is not None and ti < len(row) else ''
+                if ts < lo or (hi and ts > hi): continue
+                writer.writerow([row[i] if i is not None and i < len(row) else ''
+                                 for i in cols])
         fn = f"irrigation_history_{datetime.now().strftime('%Y%m%d')}.csv"
         return Response(
             '\ufeff' + output.getvalue(),
@@ -73,33 +85,17 @@ def download_irrigation_history():
 @download_bp.route('/api/download/sensor-data')
 def download_sensor_data():
     """탱크 수위 CSV (날짜별 센서 파일)"""
-    log_dir   = str(g._BASE_DIR / 'logs')
     date_from = request.args.get('from')
     date_to   = request.args.get('to')
     try:
-        files = sorted(glob.glob(os.path.join(log_dir, 'sensors_*.csv')))
-        if date_from:
-            files = [f for f in files if os.path.basename(f) >= f'sensors_{date_from}.csv']
-        if date_to:
-            files = [f for f in files if os.path.basename(f) <= f'sensors_{date_to}.csv']
+        files = g._sensor_csv_files(date_from, date_to)
         if not files:
             return jsonify({'error': '해당 기간 데이터 없음'}), 404
-        output = io.StringIO()
-        header_written = False
-        for fpath in files:
-            with open(fpath, 'r', encoding='utf-8') as f:
-                rows = list(csv.reader(f))
-                if not rows: continue
-                if not header_written:
-                    output.write(','.join(rows[0]) + '\n')
-                    header_written = True
-                for row in rows[1:]:
-                    output.write(','.join(row) + '\n')
         fname_from = date_from or 'all'
         fname_to   = date_to   or datetime.now().strftime('%Y-%m-%d')
         fn = f"sensor_data_{fname_from}_to_{fname_to}.csv"
         return Response(
-            '\ufeff' + output.getvalue(),
+            _concat_csv_files(files),
             mimetype='text/csv; charset=utf-8',
             headers={'Content-Disposition': f'attachment; filename={fn}'}
         )
@@ -107,6 +103,29 @@ def download_sensor_data():
         return jsonify({'error': str(e)}), 500
 
 
+def _concat_csv_files(files, chunk_size=64 * 1024):
+    """
+    일별 CSV 파일을 바이트 그대로 이어 붙여 스트리밍 (행 단위 파싱 없음)
+    헤더는 첫 파일 것만 쓰고, 빈 파일은 건너뜀. 파일이 하나여도 이 경로를 써서
+    다른 다운로드와 같이 UTF-8 BOM 을 붙임 (Excel 한글 깨짐 방지)
+    """
+    yield '\ufeff'.encode('utf-8')
+    header_written = False
+    for fpath in files:
+        with open(fpath, 'rb') as f:
+            header = f.readline()
+            if not header: continue
+            if not header_written:
+                yield header
+                header_written = True
+            last = header
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                yield chunk
+                last = chunk
+            if not last.endswith(b'\n'):
+                yield b'\n'   # 마지막 행 개행 누락 시 다음 파일 행과 붙지 않도록
+
+
 # ── ★ SHT30 공기 데이터 CSV (신규) ──────────────────────────────────────────
 
 @download_bp.route('/api/download/air-data')
@@ -194,19 +213,49 @@ def download_weather_data():
 
 # ── 파일 목록 ─────────────────────────────────────────────────────────────────
 
+_COUNT_BUF = 1 << 20
+
+
+def _count_newlines(fpath) -> int:
+    """
+    개행 수 — 버퍼 하나를 재사용해 C 레벨 count (행/청크별 객체 생성 없음)
+    버퍼는 파일 크기만큼만 (최대 1 MB) 잡음. 요청 스레드가 여럿일 수 있어 호출마다 따로 할당
+    """
+    n = 0
+    with open(fpath, 'rb', buffering=0) as f:
+        buf = bytearray(min(os.fstat(f.fileno()).st_size, _COUNT_BUF) or 1)
+        while True:
+            got = f.readinto(buf)
+            if not got:
+                return n
+            n += buf.count(b'\n', 0, got)
+
+
+_file_meta_cache: dict = {}   # path → (st_mtime_ns, st_size, 행 수)
+
+
+def _csv_meta(fpath):
+    """(크기, 데이터 행 수) — 파일이 바뀌었을 때만 다시 셈"""
+    st = os.stat(fpath)
+    cached = _file_meta_cache.get(fpath)
+    if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return st.st_size, cached[2]
+    rows = 0
+    try:
+        rows = max(0, _count_newlines(fpath) - 1)
+    except Exception:
+        pass
+    _file_meta_cache[fpath] = (st.st_mtime_ns, st.st_size, rows)
+    return st.st_size, rows
+
+
 @download_bp.route('/api/download/files')
 def list_download_files():
-    log_dir = str(g._BASE_DIR / 'logs')
+    log_dir = g.LOG_DIR
     result  = {'sensor_files': [], 'irrigation_csv': None}
-    for fpath in sorted(glob.glob(os.path.join(log_dir, 'sensors_*.csv')), reverse=True):
+    for fpath in reversed(g._sensor_csv_files()):
         fname = os.path.basename(fpath)
-        size  = os.path.getsize(fpath)
-        rows  = 0
-        try:
-            with open(fpath, 'r') as f:
-                rows = max(0, sum(1 for _ in f) - 1)
-        except Exception:
-            pass
+        size, rows = _csv_meta(fpath)
         result['sensor_files'].append({
             'filename': fname,
             'date':     fname.replace('sensors_', '').replace('.csv', ''),
@@ -215,15 +264,10 @@ def list_download_files():
         })
     irr_path = os.path.join(log_dir, 'irrigation_history.csv')
     if os.path.exists(irr_path):
-        rows = 0
-        try:
-            with open(irr_path, 'r') as f:
-                rows = max(0, sum(1 for _ in f) - 1)
-        except Exception:
-            pass
+        size, rows = _csv_meta(irr_path)
         result['irrigation_csv'] = {
             'filename': 'irrigation_history.csv',
-            'size_kb':  round(os.path.getsize(irr_path) / 1024, 1),
+            'size_kb':  round(size / 1024, 1),
             'rows':     rows
         }
     return jsonify({'success': True, 'data': result})
@@ -19,6 +19,7 @@ import logging
 from datetime import datetime
 
 from flask import Blueprint, jsonify, request
+import web.globals as g
 
 logger = logging.getLogger(__name__)
 
@@ -26,17 +27,15 @@ environment_bp = Blueprint('environment', __name__)
 
 # 프로젝트 루트 경로
 _BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_AIR_LOG_DIR     = os.path.join(_BASE_DIR, 'data', 'air_sensor_logs')
+_WEATHER_LOG_DIR = os.path.join(_BASE_DIR, 'data', 'weather_logs')
 
 
 # ──────────────────────────────────────────────────────────────────────
 # 헬퍼: globals에서 environment_monitor 가져오기
 # ──────────────────────────────────────────────────────────────────────
 def _get_monitor():
-    try:
-        from web import globals as g
-        return getattr(g, 'environment_monitor', None)
-    except Exception:
-        return None
+    return getattr(g, 'environment_monitor', None)
 
 
 # ──────────────────────────────────────────────────────────────────────
@@ -173,8 +172,7 @@ def get_weather_history():
 def get_air_logs():
     """날짜별 대기 센서 CSV 로그 조회"""
     date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
-    log_dir  = os.path.join(_BASE_DIR, 'data', 'air_sensor_logs')
-    log_file = os.path.join(log_dir, f'air_{date_str}.csv')
+    log_file = os.path.join(_AIR_LOG_DIR, f'air_{date_str}.csv')
     try:
         rows = _read_csv(log_file)
         return jsonify({'success': True, 'date': date_str, 'count': len(rows), 'data': rows})
@@ -197,8 +195,7 @@ def get_air_logs():
 def get_weather_logs():
     """날짜별 기상 CSV 로그 조회"""
     date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
-    log_dir  = os.path.join(_BASE_DIR, 'data', 'weather_logs')
-    log_file = os.path.join(log_dir, f'weather_{date_str}.csv')
+    log_file = os.path.join(_WEATHER_LOG_DIR, f'weather_{date_str}.csv')
     try:
         rows = _read_csv(log_file)
         return jsonify({'success': True, 'date': date_str, 'count': len(rows), 'data': rows})
@@ -218,9 +215,9 @@ def get_weather_logs():
 # 헬퍼
 # ──────────────────────────────────────────────────────────────────────
 def _read_csv(path: str) -> list:
-    rows = []
-    with open(path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            rows.append(dict(row))
-    return rows
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return []
+        return [dict(zip(header, row)) for row in reader]
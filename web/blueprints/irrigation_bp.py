@@ -1,6 +1,7 @@
 """
 관수 Blueprint (web/blueprints/irrigation_bp.py)
 """
+import queue
 import threading
 from datetime import datetime, timedelta
 from flask import Blueprint, jsonify, request
@@ -9,6 +10,57 @@ from web.globals import _load_soil_config, _save_soil_config, _load_schedules, _
 
 irrigation_bp = Blueprint('irrigation', __name__)
 
+# ── 수동 관수 워커 ───────────────────────────────────────────────
+# 요청마다 스레드를 만드는 대신 상주 워커 1개가 실행 (데몬 스레드라 관수 도중
+# 종료해도 프로세스가 붙잡히지 않음). 대기/실행 중인 작업은 항상 최대 1개 —
+# 그 동안 들어온 시작 요청은 쌓지 않고 409 로 거절
+_irrigation_jobs   = queue.SimpleQueue()
+_irrigation_worker = None
+_worker_lock       = threading.Lock()
+_job_state         = None   # None | 'pending' | 'running'
+
+def _irrigation_loop():
+    global _job_state
+    while True:
+        zone_id, duration = _irrigation_jobs.get()
+        with _worker_lock:
+            if _job_state != 'pending':
+                continue   # 꺼내기 직전에 긴급 정지로 취소됨
+            _job_state = 'running'
+        try:
+            g.auto_irrigation.irrigate_zone(zone_id, duration)
+        except Exception as e:
+            print(f"⚠️  수동 관수 오류 (구역 {zone_id}): {e}")
+        finally:
+            with _worker_lock:
+                _job_state = None
+
+def _submit_irrigation(zone_id, duration):
+    """수동 관수 작업 등록 — 이미 대기/실행 중이면 False"""
+    global _irrigation_worker, _job_state
+    with _worker_lock:
+        if _job_state is not None:
+            return False
+        if _irrigation_worker is None:
+            _irrigation_worker = threading.Thread(target=_irrigation_loop,
+                                                  name='irrigation-worker', daemon=True)
+            _irrigation_worker.start()
+        _job_state = 'pending'
+        _irrigation_jobs.put((zone_id, duration))
+    return True
+
+def _cancel_pending_irrigation():
+    """아직 시작 안 된 수동 관수 작업 폐기 (긴급 정지용)"""
+    global _job_state
+    with _worker_lock:
+        while True:
+            try:
+                _irrigation_jobs.get_nowait()
+            except queue.Empty:
+                break
+        if _job_state == 'pending':
+            _job_state = None
+
 # ── 호스건 ───────────────────────────────────────────────────────
 @irrigation_bp.route('/api/hose-gun/status', methods=['GET'])
 def get_hose_gun_status():
@@ -44,7 +96,9 @@ def deactivate_hose_gun():
 def get_irrigation_status():
     if g.auto_irrigation is None:
         return jsonify({'success': False, 'error': '자동 관수 시스템 초기화 안됨'}), 503
-    return jsonify({'success': True, 'data': g.auto_irrigation.get_status()})
+    data = g.auto_irrigation.get_status()
+    data['queued'] = 1 if _job_state == 'pending' else 0   # 시작 대기 중인 수동 관수 (최대 1)
+    return jsonify({'success': True, 'data': data})
 
 @irrigation_bp.route('/api/irrigation/mode', methods=['POST'])
 def set_irrigation_mode():
@@ -72,14 +126,14 @@ def start_irrigation():
     if g.auto_irrigation.is_irrigating:
         return jsonify({'success': False,
                         'error': f'이미 관수 중 (구역 {g.auto_irrigation.current_zone})'}), 409
-    def run():
-        g.auto_irrigation.irrigate_zone(int(zone_id), int(duration))
-    threading.Thread(target=run, daemon=True).start()
+    if not _submit_irrigation(int(zone_id), int(duration)):
+        return jsonify({'success': False, 'error': '이전 관수 요청 처리 중'}), 409
     return jsonify({'success': True, 'message': f'구역 {zone_id} 관수 시작 ({duration}초)'})
 
 @irrigation_bp.route('/api/irrigation/stop', methods=['POST'])
 def stop_irrigation():
     try:
+        _cancel_pending_irrigation()   # 대기 중인 작업이 정지 후 밸브를 다시 열지 않도록 먼저 폐기
         if g.relay_controller:
             g.relay_controller.emergency_stop()
         if g.auto_irrigation:
@@ -128,8 +182,7 @@ def get_irrigation_history():
     if g.auto_irrigation is None:
         return jsonify({'success': False, 'error': '자동 관수 시스템 없음'}), 503
     limit   = int(request.args.get('limit', 20))
-    history = g.auto_irrigation.irrigation_history[-limit:]
-    return jsonify({'success': True, 'data': list(reversed(history)),
+    return jsonify({'success': True, 'data': g.auto_irrigation.irrigation_history[-limit:][::-1],
                     'total': len(g.auto_irrigation.irrigation_history)})
 
 # ── 관수 설정 ─────────────────────────────────────────────────────
@@ -194,16 +247,15 @@ def save_irrigation_thresholds():
 # ── 스케줄 관리 ────────────────────────────────────────────────────
 @irrigation_bp.route('/api/schedules/next', methods=['GET'])
 def get_next_schedule():
-    from datetime import datetime as _dt, timedelta as _td
     def _calc_minutes_until(start_time_str, days):
-        now = _dt.now()
+        now = datetime.now()
         try:
             h, m = map(int, start_time_str.split(':'))
         except Exception:
             return None
         best = None
         for delta_day in range(8):
-            target = now.replace(hour=h, minute=m, second=0, microsecond=0) + _td(days=delta_day)
+            target = now.replace(hour=h, minute=m, second=0, microsecond=0) + timedelta(days=delta_day)
             if target <= now: continue
             dow = target.weekday()
             if days and dow not in days: continue
@@ -211,10 +263,10 @@ def get_next_schedule():
             if best is None or diff_min < best: best = diff_min
         return best
     def _calc_minutes_until_routine(start_date_str, start_time_str, interval_days):
-        now = _dt.now()
+        now = datetime.now()
         try:
             h, m = map(int, start_time_str.split(':'))
-            base = _dt.strptime(start_date_str, '%Y-%m-%d').replace(hour=h, minute=m)
+            base = datetime.strptime(start_date_str, '%Y-%m-%d').replace(hour=h, minute=m)
         except Exception:
             return None
         if interval_days < 1: interval_days = 1
@@ -223,7 +275,7 @@ def get_next_schedule():
             next_run = base
         else:
             cycles   = int(delta // (interval_days * 86400)) + 1
-            next_run = base + _td(days=cycles * interval_days)
+            next_run = base + timedelta(days=cycles * interval_days)
         return int((next_run - now).total_seconds() // 60)
     if g.irrigation_scheduler and g.irrigation_scheduler._running:
         try:
@@ -236,8 +288,8 @@ def get_next_schedule():
                         except Exception: pass
                     if s.get('next_run'):
                         try:
-                            _nrdt = _dt.strptime(s['next_run'], '%Y-%m-%d %H:%M')
-                            s['minutes_until'] = max(int((_nrdt - _dt.now()).total_seconds() // 60), 0)
+                            _nrdt = datetime.strptime(s['next_run'], '%Y-%m-%d %H:%M')
+                            s['minutes_until'] = max(int((_nrdt - datetime.now()).total_seconds() // 60), 0)
                         except Exception:
                             s['minutes_until'] = _calc_minutes_until(s.get('start_time','00:00'), s.get('days',[])) or 0
                     elif s.get('start_time'):
@@ -305,7 +357,7 @@ def add_schedule():
             new_s = {'id': new_id, 'type': 'routine', 'zone_id': zone_id, 'duration': duration,
                      'start_date': start_date, 'start_time': start_time,
                      'interval_days': interval_days, 'check_moisture': check_moisture,
-                     'enabled': True, 'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+                     'enabled': True, 'created_at': g._now_str()}
         else:
             start_time = body.get('start_time', '')
             days       = [int(d) for d in body.get('days', [])]
@@ -316,7 +368,7 @@ def add_schedule():
                 return jsonify({'success': False, 'error': '시간 형식이 HH:MM이어야 합니다'}), 400
             new_s = {'id': new_id, 'type': 'schedule', 'zone_id': zone_id,
                      'start_time': start_time, 'duration': duration, 'days': days,
-                     'enabled': True, 'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+                     'enabled': True, 'created_at': g._now_str()}
         schedules.append(new_s)
         _save_schedules({'schedules': schedules})
         return jsonify({'success': True, 'schedule': new_s, 'message': f'스케줄 #{new_id}가 추가되었습니다'})
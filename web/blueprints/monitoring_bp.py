@@ -1,53 +1,18 @@
 """
 모니터링 Blueprint (web/blueprints/monitoring_bp.py)
 """
-import os
-import threading
 from datetime import datetime, timedelta
 from flask import Blueprint, jsonify, request
 import web.globals as g
+from monitoring.alert_manager import AlertLevel
 
 monitoring_bp = Blueprint('monitoring', __name__)
 
 @monitoring_bp.route('/api/status')
 def get_status():
     try:
-        status = {
-            'monitoring_active': g.monitoring_active,
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        if g.sensor_monitor and g.monitoring_active:
-            history = g.sensor_monitor.get_history(limit=1)
-            if history:
-                last_data = history[0]
-                ts = last_data['timestamp']
-                ts_str = ts if isinstance(ts, str) else ts.strftime('%Y-%m-%d %H:%M:%S')
-                status.update({
-                    'timestamp':   ts_str,
-                    'tank1_level': round(last_data['tank1_level'], 1),
-                    'tank2_level': round(last_data['tank2_level'], 1),
-                    'voltages':    [round(v, 3) if v is not None else None for v in last_data['voltages']]
-                })
-            else:
-                status.update({
-                    'tank1_level': round(g.cached_sensor_data.get('tank1_level', 0.0), 1),
-                    'tank2_level': round(g.cached_sensor_data.get('tank2_level', 0.0), 1),
-                    'voltages':    [round(v, 3) if v is not None else None for v in g.cached_sensor_data.get('voltages', [0.0]*4)]
-                })
-                if g.cached_sensor_data.get('timestamp'):
-                    status['timestamp'] = g.cached_sensor_data['timestamp']
-        else:
-            status.update({'tank1_level': 0.0, 'tank2_level': 0.0, 'voltages': [0.0]*4})
-        if g.alert_manager:
-            as_ = g.alert_manager.get_current_status()
-            status.update({
-                'alert_count_24h':    as_['alert_count_24h'],
-                'critical_count_24h': as_['critical_count_24h'],
-                'warning_count_24h':  as_['warning_count_24h']
-            })
         # ── 센서 오류 정보 (BUG-14 P2) ────────────────────────────
         sensor_errors = {}
-        sensor_stats = {}
         try:
             if hasattr(g, 'alert_manager') and g.alert_manager:
                 am = g.alert_manager
@@ -58,6 +23,36 @@ def get_status():
                     sensor_errors[key] = bool(cnt > 0)
         except Exception:
             pass
+        # 모니터링 중에는 본문이 샘플/경고/24h 경고 수/센서 오류 플래그가 바뀔 때만 달라지므로
+        # ETag 로 304 처리. 오류 카운터는 샘플 게시 뒤 check_all 에서, 경고 없이도 바뀌므로 직접 포함
+        # (정지 중에는 timestamp 가 현재 시각이라 매번 달라짐 → ETag 없음)
+        as_ = g.alert_manager.get_current_status() if g.alert_manager else None
+        etag = None
+        if g.sensor_monitor and g.monitoring_active and g.cached_sensor_data.get('timestamp'):
+            counts = (f"{as_['alert_count_24h']}.{as_['critical_count_24h']}.{as_['warning_count_24h']}"
+                      if as_ else '0')
+            errs = ''.join('1' if v else '0' for v in sensor_errors.values())
+            etag = (f"{g.BOOT_ID}-{g.sample_seq}-{g.alert_manager.alert_seq if g.alert_manager else 0}"
+                    f"-{counts}-{errs}")
+            if etag in request.if_none_match:
+                return '', 304
+        now_str = g._now_str()
+        status = {'monitoring_active': g.monitoring_active, 'timestamp': now_str}
+        if g.sensor_monitor and g.monitoring_active:
+            # periodic_data_sender 가 샘플마다 갱신하는 반올림 캐시 사용 (히스토리 조회 없음)
+            payload = g.sensor_payload or g._refresh_sensor_payload()
+            status.update(payload)
+            if not payload['timestamp']:
+                status['timestamp'] = now_str
+        else:
+            status.update({'tank1_level': 0.0, 'tank2_level': 0.0, 'voltages': [0.0]*4})
+        if as_:
+            status.update({
+                'alert_count_24h':    as_['alert_count_24h'],
+                'critical_count_24h': as_['critical_count_24h'],
+                'warning_count_24h':  as_['warning_count_24h']
+            })
+        sensor_stats = {}
         try:
             if hasattr(g, 'sensor_monitor') and g.sensor_monitor:
                 sr = getattr(g.sensor_monitor, 'sensor_reader', None)
@@ -69,7 +64,11 @@ def get_status():
             pass
         status['sensor_errors'] = sensor_errors
         status['sensor_stats'] = sensor_stats
-        return jsonify(status)
+        resp = jsonify(status)
+        if etag:
+            resp.set_etag(etag)
+            resp.headers['Cache-Control'] = 'no-cache'
+        return resp
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -80,11 +79,12 @@ def start_monitoring():
             return jsonify({'error': '모니터링 시스템이 초기화되지 않았습니다'}), 500
         if g.monitoring_active:
             return jsonify({'message': '이미 모니터링 중입니다'})
+        g.monitoring_wake.clear()
         g.monitoring_active = True
-        from web.app import periodic_data_sender
-        t = threading.Thread(target=periodic_data_sender, daemon=True)
-        t.start()
-        g.monitoring_thread = t
+        # 직전 stop 후 아직 종료 전인 sender 가 있으면 그대로 계속 사용 (버스 이중 접근 방지)
+        if g._task_alive(g.monitoring_thread):
+            return jsonify({'message': '모니터링 재개됨'})
+        g.start_periodic_sender()
         return jsonify({'message': '모니터링 시작됨'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -97,6 +97,7 @@ def stop_monitoring():
         if not g.monitoring_active:
             return jsonify({'message': '모니터링이 실행 중이 아닙니다'})
         g.monitoring_active = False
+        g.monitoring_wake.set()
         return jsonify({'message': '모니터링 중지됨'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -111,12 +112,18 @@ def get_alerts():
         alert_level = None
         if level:
             try:
-                from monitoring.alert_manager import AlertLevel
                 alert_level = AlertLevel[level.upper()]
             except KeyError:
                 pass
+        # 새 경고가 없으면 304 (ETag 는 URL 별로 캐시되므로 쿼리 값은 넣지 않음)
+        etag = f"{g.BOOT_ID}-{g.alert_manager.alert_seq}"
+        if etag in request.if_none_match:
+            return '', 304
         alerts = g.alert_manager.get_alert_history(level=alert_level, limit=limit)
-        return jsonify({'alerts': [a.to_dict() for a in alerts]})
+        resp = jsonify({'alerts': [a.to_dict() for a in alerts]})
+        resp.set_etag(etag)
+        resp.headers['Cache-Control'] = 'no-cache'
+        return resp
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -128,8 +135,20 @@ def get_data_history():
         hours = request.args.get('hours', 24, type=int)
         end_date   = datetime.now()
         start_date = end_date - timedelta(hours=hours)
-        data = g.data_logger.get_data(start_date=start_date, end_date=end_date)
-        return jsonify({'data': data[-100:] if len(data) > 100 else data})
+        # ?since=YYYY-MM-DD HH:MM:SS — 마지막으로 받은 행 이후만 (폴링 시 증분 조회)
+        since = request.args.get('since')
+        if since:
+            try:
+                since_dt = datetime.fromisoformat(since)
+            except ValueError:
+                return jsonify({'error': 'since 형식 오류 (YYYY-MM-DD HH:MM:SS)'}), 400
+            if since_dt.tzinfo is not None:
+                # 저장된 타임스탬프는 로컬 시각(naive) — 오프셋이 있으면 로컬로 변환
+                since_dt = since_dt.astimezone().replace(tzinfo=None)
+            since_dt += timedelta(seconds=1)
+            start_date = max(start_date, since_dt)
+        data = g.data_logger.get_data(start_date=start_date, end_date=end_date, limit=100)
+        return jsonify({'data': data})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -147,23 +166,49 @@ def get_statistics():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def validate_voltage(value, field_name):
-    try:
-        num = float(value)
+# (요청 키, 필드, 오류 메시지용 이름) — save_calibration 입력 순서
+_CALIBRATION_FIELDS = (
+    ('tank1_water',    'empty_value', 'Tank 1 Empty'),
+    ('tank1_water',    'full_value',  'Tank 1 Full'),
+    ('tank2_nutrient', 'empty_value', 'Tank 2 Empty'),
+    ('tank2_nutrient', 'full_value',  'Tank 2 Full'),
+)
+
+def validate_voltages(data):
+    """
+    캘리브레이션 전압 4개를 한 번에 검증 (0V ~ 5.0V, 소수점 3자리)
+    잘못된 값이 여러 개면 오류를 모두 모아서 ValueError 로 보고
+    """
+    values, errors = [], []
+    for group, key, name in _CALIBRATION_FIELDS:
+        try:
+            num = float(data[group][key])
+        except (KeyError, TypeError, ValueError):
+            errors.append(f"{name}는 유효한 숫자가 아닙니다")
+            continue
         if not (0 <= num <= 5.0):
-            raise ValueError(f"{field_name}는 0V ~ 5.0V 범위여야 합니다 (입력값: {num}V)")
-        return round(num, 3)
-    except (ValueError, TypeError):
-        raise ValueError(f"{field_name}는 유효한 숫자가 아닙니다")
+            errors.append(f"{name}는 0V ~ 5.0V 범위여야 합니다 (입력값: {num}V)")
+            continue
+        values.append(round(num, 3))
+    if errors:
+        raise ValueError('; '.join(errors))
+    return values
 
 @monitoring_bp.route('/api/calibration', methods=['GET'])
 def get_calibration():
     try:
-        import json
-        config_path = str(g._BASE_DIR / 'config/sensor_calibration.json')
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return jsonify(json.load(f))
+        try:
+            calibration = g._load_cached_json(g.CALIBRATION_PATH)
+        except FileNotFoundError:
+            calibration = None
+        if calibration is not None:
+            etag = g.json_etag(g.CALIBRATION_PATH)
+            if etag in request.if_none_match:
+                return '', 304
+            resp = jsonify(calibration)
+            resp.set_etag(etag)
+            resp.headers['Cache-Control'] = 'no-cache'
+            return resp
         return jsonify({
             'sensor_type': 'voltage',
             'tank1_water':    {'empty_value': 0.5, 'full_value': 4.5, 'calibrated_at': None},
@@ -172,40 +217,41 @@ def get_calibration():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _relevel_cached_sample():
+    """마지막 측정 전압에 새 보정값을 적용해 수위만 다시 계산 (ADC 재측정 없음)"""
+    d = g.cached_sensor_data
+    if not d.get('timestamp'):
+        return   # 아직 측정값 없음 — 다음 주기 측정에서 새 보정값이 적용됨
+    v  = d.get('voltages') or []
+    sm = g.sensor_monitor
+    g._publish_sample({
+        'timestamp':   d['timestamp'], 'voltages': v,
+        'tank1_level': sm.voltage_to_level(v[0] if len(v) > 0 else None, 1),
+        'tank2_level': sm.voltage_to_level(v[1] if len(v) > 1 else None, 2),
+    })
+
 @monitoring_bp.route('/api/calibration', methods=['POST'])
 def save_calibration():
     try:
-        import json
         data        = request.get_json()
-        config_path = str(g._BASE_DIR / 'config/sensor_calibration.json')
         if data.get('update_type_only'):
-            calibration = {}
-            if os.path.exists(config_path):
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    calibration = json.load(f)
+            try:
+                calibration = dict(g._load_cached_json(g.CALIBRATION_PATH))
+            except FileNotFoundError:
+                calibration = {}
             calibration['sensor_type']  = data.get('sensor_type', 'voltage')
-            calibration['last_updated'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            calibration['last_updated'] = g._now_str()
         else:
-            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            now = g._now_str()
+            t1_empty, t1_full, t2_empty, t2_full = validate_voltages(data)
             calibration = {
                 'sensor_type': data.get('sensor_type', 'voltage'), 'last_updated': now,
-                'tank1_water': {
-                    'empty_value': validate_voltage(data['tank1_water']['empty_value'], 'Tank 1 Empty'),
-                    'full_value':  validate_voltage(data['tank1_water']['full_value'],  'Tank 1 Full'),
-                    'calibrated_at': now
-                },
-                'tank2_nutrient': {
-                    'empty_value': validate_voltage(data['tank2_nutrient']['empty_value'], 'Tank 2 Empty'),
-                    'full_value':  validate_voltage(data['tank2_nutrient']['full_value'],  'Tank 2 Full'),
-                    'calibrated_at': now
-                }
+                'tank1_water':    {'empty_value': t1_empty, 'full_value': t1_full, 'calibrated_at': now},
+                'tank2_nutrient': {'empty_value': t2_empty, 'full_value': t2_full, 'calibrated_at': now}
             }
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(calibration, f, indent=2, ensure_ascii=False)
-        g.sensor_monitor.load_calibration(config_path)
-        new_data = g.sensor_monitor._collect_sensor_data()
-        g.sensor_monitor._last_data = new_data
-        g.cached_sensor_data.update(new_data)
+        g._store_cached_json(g.CALIBRATION_PATH, calibration)
+        g.sensor_monitor.load_calibration(g.CALIBRATION_PATH, force=True)
+        _relevel_cached_sample()
         return jsonify({'success': True, 'message': '캘리브레이션 설정이 저장되고 적용되었습니다'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -213,21 +259,26 @@ def save_calibration():
 @monitoring_bp.route('/api/calibration/current', methods=['GET'])
 def get_current_sensor_values():
     try:
-        import json
-        config_path = str(g._BASE_DIR / 'config/sensor_calibration.json')
-        calibration = {}
-        sensor_type = 'voltage'
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                calibration = json.load(f)
-                sensor_type = calibration.get('sensor_type', 'voltage')
+        try:
+            calibration = g._load_cached_json(g.CALIBRATION_PATH)
+            calib_ver   = g.json_etag(g.CALIBRATION_PATH)
+        except FileNotFoundError:
+            calibration, calib_ver = {}, 0
+        # 캘리브레이션 파일과 샘플이 그대로면 304 (본문 인코딩/전송 생략)
+        etag = f"{g.BOOT_ID}-{calib_ver}-{g.sample_seq}"
+        if etag in request.if_none_match:
+            return '', 304
+        sensor_type = calibration.get('sensor_type', 'voltage')
         voltages    = g.cached_sensor_data.get('voltages', [0]*4)
-        return jsonify({
+        resp = jsonify({
             'success': True, 'sensor_type': sensor_type,
             'tank1_value': voltages[0] if len(voltages) > 0 else 0,
             'tank2_value': voltages[1] if len(voltages) > 1 else 0,
             'tank1_water':   calibration.get('tank1_water', {}),
             'tank2_nutrient': calibration.get('tank2_nutrient', {})
         })
+        resp.set_etag(etag)
+        resp.headers['Cache-Control'] = 'no-cache'
+        return resp
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1,6 +1,5 @@
 """알림 Blueprint"""
-import json, os, subprocess, threading
-from datetime import datetime
+import json, os, subprocess, threading, time
 from flask import Blueprint, jsonify, request
 import web.globals as g
 
@@ -16,7 +15,7 @@ def get_notification_status():
 def get_notification_config():
     try:
         cfg = {}
-        cfg_path = str(g._BASE_DIR / 'config/notifications.json')
+        cfg_path = g.NOTIFICATIONS_PATH
         if os.path.exists(cfg_path):
             with open(cfg_path,'r',encoding='utf-8') as f:
                 raw = f.read().strip()
@@ -31,7 +30,7 @@ def get_notification_config():
 def save_notification_config():
     try:
         incoming = request.get_json(force=True, silent=True) or {}
-        cfg_path = str(g._BASE_DIR / 'config/notifications.json')
+        cfg_path = g.NOTIFICATIONS_PATH
         base = {}
         if os.path.exists(cfg_path):
             with open(cfg_path,'r',encoding='utf-8') as f:
@@ -68,7 +67,7 @@ def send_notification_test():
         return jsonify({"success": False, "message": "텔레그램 봇이 초기화되지 않았습니다"})
     try:
         g.telegram_notifier.send(
-            f"🧪 <b>테스트 메시지</b>\n⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n✅ 알림 설정이 정상 작동 중입니다!")
+            f"🧪 <b>테스트 메시지</b>\n⏰ {g._now_str()}\n✅ 알림 설정이 정상 작동 중입니다!")
         return jsonify({"success": True, "message": "테스트 메시지 전송 완료"})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -80,7 +79,7 @@ def api_system_restart():
             g.telegram_notifier.send("🔄 [서버 재시작]\n웹 UI에서 서버 재시작을 요청했습니다.\n약 10초 후 자동으로 재연결됩니다.")
     except Exception: pass
     def _do_restart():
-        import time as _t; _t.sleep(2)
+        time.sleep(2)
         subprocess.run(["sudo","systemctl","restart","smart-farm.service"], check=False)
     threading.Thread(target=_do_restart, daemon=True).start()
     return jsonify({"success": True, "message": "서버 재시작 요청 완료. 약 10초 후 새로고침하세요."})
@@ -2,14 +2,26 @@
 공유 전역 변수 모듈 (web/globals.py)
 모든 Blueprint에서 'import web.globals as g' 형태로 import하여 사용
 """
+import copy
 import json
 import os
+import threading
+import time
 from pathlib import Path
 
+try:
+    import orjson        # 선택: 설정 파일 읽기/쓰기 가속 (없으면 표준 json)
+except ImportError:
+    orjson = None
+
 _BASE_DIR = Path(__file__).resolve().parent.parent
 
-SOIL_SENSORS_PATH = str(_BASE_DIR / 'config/soil_sensors.json')
-SCHEDULES_PATH    = str(_BASE_DIR / 'config/schedules.json')
+SOIL_SENSORS_PATH   = str(_BASE_DIR / 'config/soil_sensors.json')
+SCHEDULES_PATH      = str(_BASE_DIR / 'config/schedules.json')
+CALIBRATION_PATH    = str(_BASE_DIR / 'config/sensor_calibration.json')
+NOTIFICATIONS_PATH  = str(_BASE_DIR / 'config/notifications.json')
+LOG_DIR             = str(_BASE_DIR / 'logs')
+IRRIGATION_CSV_PATH = str(_BASE_DIR / 'logs/irrigation_history.csv')
 
 sensor_monitor      = None
 data_logger         = None
@@ -22,6 +34,16 @@ irrigation_scheduler= None
 
 monitoring_active  = False
 monitoring_thread  = None
+# periodic_data_sender 시작 함수 — app.py 가 등록 (Blueprint 에서 web.app 을 import 하면
+# python3 web/app.py 실행 시 __main__ 과 별개인 두 번째 app 모듈이 로드됨)
+start_periodic_sender = None
+
+def _task_alive(t):
+    """백그라운드 태스크 생존 여부 (threading.Thread / eventlet GreenThread 공통)"""
+    if t is None: return False
+    if hasattr(t, 'is_alive'): return t.is_alive()
+    return not getattr(t, 'dead', True)
+monitoring_wake    = threading.Event()   # sender 의 주기 대기를 깨움 (stop_monitoring, 새 클라이언트 연결)
 
 cached_sensor_data = {
     'timestamp':   None,
@@ -30,11 +52,109 @@ cached_sensor_data = {
     'tank2_level': 0.0,
     'sensor_type': 'voltage'
 }
+# 'sensor_update' 이벤트용 반올림 사본 — 새 샘플이 들어올 때만 다시 만듦
+sensor_payload = None
+sample_seq     = 0      # 게시된 샘플 번호 (ETag 등 변경 감지용)
+BOOT_ID        = format(time.time_ns(), 'x')   # 재시작 후 카운터가 0 부터 다시 세도 ETag 가 겹치지 않게
+
+def _publish_sample(data):
+    """
+    새 측정값 게시 — cached_sensor_data 를 update 하지 않고 참조를 통째로 교체
+    g.cached_sensor_data 와 SensorMonitor._last_data 는 같은 dict 를 가리킴 (복사 없음).
+    data 는 새로 만들어진 측정 dict 여야 하며 게시 후에는 수정하지 않음
+    """
+    global cached_sensor_data, sample_seq
+    sensor_type = 'voltage'
+    if sensor_monitor:
+        sensor_type = sensor_monitor.sensor_reader.calibration.get('sensor_type', 'voltage')
+    data['sensor_type'] = sensor_type
+    if sensor_monitor:
+        sensor_monitor._last_data = data
+    cached_sensor_data = data
+    sample_seq += 1
+    return _refresh_sensor_payload()
+
+def _refresh_sensor_payload():
+    """cached_sensor_data 로부터 sensor_update payload 를 한 번만 계산해 캐시"""
+    global sensor_payload
+    d = cached_sensor_data
+    ts = d.get('timestamp') or ''
+    sensor_payload = {
+        'timestamp':   ts if isinstance(ts, str) else ts.strftime('%Y-%m-%d %H:%M:%S'),
+        'tank1_level': round(d.get('tank1_level', 0), 1),
+        'tank2_level': round(d.get('tank2_level', 0), 1),
+        # SensorMonitor 가 채널별 평균을 이미 소수점 3자리로 반올림해 둠 (None = 채널 오류)
+        'voltages':    d.get('voltages', [0, 0, 0, 0])
+    }
+    return sensor_payload
+
+_now_cache = [None, '']   # [초 단위 epoch, 포맷된 문자열]
+
+def _now_str():
+    """현재 시각 'YYYY-MM-DD HH:MM:SS' — 같은 초 안에서는 포맷 결과 재사용"""
+    sec = int(time.time())
+    if _now_cache[0] != sec:
+        _now_cache[1] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(sec))
+        _now_cache[0] = sec
+    return _now_cache[1]
+
+def _read_json(path):
+    if orjson:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_json(path, obj):
+    """
+    들여쓰기 2칸, 한글 그대로 (ensure_ascii=False 와 동일한 출력)
+    임시 파일에 쓴 뒤 os.replace 로 교체 — 읽는 쪽은 이전 파일 또는
+    완성된 새 파일만 보게 됨 (쓰다 만 JSON 없음)
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    if orjson:
+        with open(tmp, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+_json_cache = {}   # path → ((st_mtime_ns, st_size), 파싱 결과)
+
+def _load_cached_json(path):
+    """
+    JSON 설정 파일 읽기 (파일이 바뀌었을 때만 다시 파싱)
+    반환값은 캐시와 공유되므로 수정하려면 복사해서 사용
+    이 모듈의 _save_* 는 저장 시 캐시를 바로 비우고, 다른 프로세스/모듈
+    (irrigation.scheduler 등)이 쓴 변경은 mtime/크기 비교로 감지
+    """
+    st  = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    cur = _json_cache.get(path)
+    if cur and cur[0] == key:
+        return cur[1]
+    data = _read_json(path)
+    _json_cache[path] = (key, data)
+    return data
+
+def _store_cached_json(path, obj):
+    """JSON 저장 후 캐시를 새 내용으로 채움 (다음 읽기에서 다시 파싱하지 않음)
+    obj 는 캐시와 공유되므로 저장 후 수정하지 말 것"""
+    _json_cache.pop(path, None)
+    _write_json(path, obj)
+    st = os.stat(path)
+    _json_cache[path] = ((st.st_mtime_ns, st.st_size), obj)
+
+def json_etag(path):
+    """_load_cached_json 으로 읽은 파일 내용의 ETag 값 (st_mtime_ns-st_size)"""
+    mtime_ns, size = _json_cache[path][0]
+    return f"{mtime_ns}-{size}"
 
 def _load_soil_config():
     try:
-        with open(SOIL_SENSORS_PATH, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return copy.deepcopy(_load_cached_json(SOIL_SENSORS_PATH))
     except Exception:
         return {
             "modbus": {},
@@ -51,21 +171,43 @@ def _load_soil_config():
         }
 
 def _save_soil_config(cfg):
-    os.makedirs(os.path.dirname(SOIL_SENSORS_PATH), exist_ok=True)
-    with open(SOIL_SENSORS_PATH, 'w', encoding='utf-8') as f:
-        json.dump(cfg, f, indent=2, ensure_ascii=False)
+    _json_cache.pop(SOIL_SENSORS_PATH, None)
+    _write_json(SOIL_SENSORS_PATH, cfg)
 
 def _load_schedules():
     try:
-        with open(SCHEDULES_PATH, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return copy.deepcopy(_load_cached_json(SCHEDULES_PATH))
     except Exception:
         return {"schedules": []}
 
 def _save_schedules(data):
-    os.makedirs(os.path.dirname(SCHEDULES_PATH), exist_ok=True)
-    with open(SCHEDULES_PATH, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    _json_cache.pop(SCHEDULES_PATH, None)
+    _write_json(SCHEDULES_PATH, data)
+
+_sensor_csv_cache = (None, [])   # (logs 디렉터리 st_mtime_ns, 정렬된 파일 경로)
+
+def _sensor_csv_files(date_from=None, date_to=None):
+    """
+    logs/sensors_YYYY-MM-DD.csv 목록 (날짜순, 범위 지정 시 파일명 문자열 비교로 필터)
+    파일 생성/삭제 때만 디렉터리 mtime 이 바뀌므로 그때만 다시 scandir
+    """
+    global _sensor_csv_cache
+    try:
+        mtime = os.stat(LOG_DIR).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    if _sensor_csv_cache[0] != mtime:
+        with os.scandir(LOG_DIR) as it:
+            names = sorted(e.name for e in it
+                           if e.name.startswith('sensors_') and e.name.endswith('.csv'))
+        _sensor_csv_cache = (mtime, [os.path.join(LOG_DIR, n) for n in names])
+    files = _sensor_csv_cache[1]
+    if date_from or date_to:
+        lo = f'sensors_{date_from}.csv' if date_from else ''
+        hi = f'sensors_{date_to}.csv'   if date_to   else None
+        files = [f for f in files
+                 if os.path.basename(f) >= lo and (hi is None or os.path.basename(f) <= hi)]
+    return files
 
 
 # ══════════════════════════════════════════════════════════════════════
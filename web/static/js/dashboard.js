@@ -19,6 +19,7 @@ let chartData = {
 
 socket.on('connect', () => {
     console.log('✅ 서버 연결됨');
+    socket.emit('subscribe', ['dashboard']);   // 재연결 시에도 다시 구독
     });
 
 socket.on('disconnect', () => {
@@ -29,16 +30,25 @@ socket.on('connected', (data) => {
     // console.log('📡', data.message);  // 디버그용
 });
 
-socket.on('sensor_update', (data) => {
+function onSensorUpdate(data) {
     // console.log('📊 센서 데이터 수신:', data);  // 디버그용
     updateSensorData(data);
     updateChart(data);
-});
+}
 
-socket.on('new_alert', (alert) => {
+function onNewAlert(alert) {
     console.log('🚨 새 경고:', alert);
     addAlertToList(alert);
     updateAlertCount();
+}
+
+socket.on('sensor_update', onSensorUpdate);
+socket.on('new_alert', onNewAlert);
+
+// 주기 전송: 센서 데이터 + 같은 주기에 발생한 경고를 한 프레임으로 수신
+socket.on('tick', (msg) => {
+    onSensorUpdate(msg.sensor);
+    (msg.alerts || []).forEach(onNewAlert);
 });
 
 // ============================================================